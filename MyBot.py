@@ -3,20 +3,26 @@
 
 import hlt
 from hlt import constants
-from hlt.entity import Ship
-from hlt.positionals import Direction, Position
-import random
+from hlt.navigation import Navigator, PathPlanner, rank_mining_moves
+from hlt.positionals import Direction
+import heapq
 import logging
 
 BOT_VERSION = "amezhenin-v11"
-DIRECTIONS = [Direction.North, Direction.South, Direction.East, Direction.West]
 MAX_OWN_SHIPS = 20
 MIN_DROPOFF_DIST = 20
+# radius of the area whose halite is summed up to rate a dropoff place
+DROPOFF_RADIUS = 5
+# seconds of the turn budget kept for the ship moves when scanning for a dropoff place
+DROPOFF_SCAN_RESERVE = 0.5
+# how many dropoff places the warm-up ranks and logs
+WARM_UP_DROPOFF_PLACES = 5
 
 
 class Bot:
-    def __init__(self):
-        self.game = hlt.Game()
+    def __init__(self, game=None):
+        # a game can be passed in to run the bot on something else than the engine, e.g. a replay
+        self.game = game if game is not None else hlt.Game()
         self.SHIP_BUILD_MAX_TURN = constants.MAX_TURNS / 2
 
         self.me = None
@@ -24,6 +30,11 @@ class Bot:
         self.game_map = None
         self.command_queue = []
         self.my_ships = []
+        self.navigator = None
+        self.planner = None
+
+        # fill the map caches while waiting for the engine, the next frame only patches them
+        self.game.speculate(self.precompute)
 
 
     def start(self):
@@ -31,49 +42,106 @@ class Bot:
         # At this point "game" variable is populated with initial map data.
         # This is a good place to do computationally expensive start-up pre-processing.
         # As soon as you call "ready" function below, the 2 second per turn timer will start.
+        self.game.warm_up(self.warm_up)
         self.game.ready(BOT_VERSION)
 
-        logging.info("Successfully created bot! My Player ID is {}.".format(self.game.my_id))
-        logging.info("Max turns %s" % constants.MAX_TURNS)
+        logging.info("Successfully created bot! My Player ID is %s.", self.game.my_id)
+        logging.info("Max turns %s", constants.MAX_TURNS)
 
         """ <<<Game Loop>>> """
         while True:
             self.update_frame()
+            self.play_turn()
+
 
-            # self.attack_enemy_shipyard()
+    def play_turn(self):
+        profiler = self.game.profiler
+        # self.attack_enemy_shipyard()
+        with profiler.phase('construct_dropoff'):
             self.construct_dropoff()
 
+        with profiler.phase('ships'):
+            miners = []
             for ship in self.my_ships:
-                if ship.halite_amount >= constants.MAX_HALITE * 0.9:
+                if self.game.deadline.expired():
+                    # out of time: keep the remaining ships in place rather than time out
+                    self.navigator.request(ship, [Direction.Still])
+                elif ship.halite_amount >= constants.MAX_HALITE * 0.9:
                     # navigate to home
-                    move = self.drop_halite(ship)
-                    self.command_queue.append(ship.move(move))
+                    with profiler.phase('drop_halite'):
+                        self.navigator.request(ship, self.drop_halite(ship))
                 elif self.is_end_game(ship):
-                    move = self.drop_halite(ship, force=True)
-                    self.command_queue.append(ship.move(move))
+                    with profiler.phase('drop_halite'):
+                        self.navigator.request(ship, self.drop_halite(ship, force=True))
                 else:
-                    move = self.collect(ship)
-                    self.command_queue.append(ship.move(move))
-
+                    miners.append(ship)
+            # the miners are scored all at once
+            with profiler.phase('collect'):
+                for ship, directions in zip(miners, self.collect(miners)):
+                    self.navigator.request(ship, directions)
+
+        # all ships move at once, without collisions between our own ships
+        with profiler.phase('navigation'):
+            for ship, move in self.navigator.resolve():
+                self.command_queue.append(ship.move(move))
+
+        with profiler.phase('build_ship'):
             self.build_ship()
-            # Send your moves back to the game environment, ending this turn.
-            self.game.end_turn(self.command_queue)
+        # Send your moves back to the game environment, ending this turn.
+        self.game.end_turn(self.command_queue)
 
 
     def update_frame(self):
         self.game.update_frame()
         # You extract player metadata and the updated map metadata here for convenience.
         self.me = self.game.me
-        self.enemies = list(filter(lambda x: x.id != self.me.id, self.game.players.values()))
+        self.enemies = self.game.enemies()
         self.game_map = self.game.game_map
         self.command_queue = []
         self.my_ships = self.me.get_ships()
+        self.navigator = Navigator(self.game_map, self.me.id)
+        self.planner = PathPlanner(self.game_map, self.me.id)
+        for ship in self.my_ships:
+            if ship.halite_amount < self.game_map[ship.position].halite_amount // constants.MOVE_COST_RATIO:
+                # can't pay for moving: returning ships have to route around it
+                self.planner.reserve(ship.position, ship_id=ship.id)
+
+
+    def warm_up(self):
+        """
+        Runs before the game starts, untimed: ranks the dropoff places on the initial map, which also builds the
+        halite density the dropoff search reads.
+        """
+        game_map = self.game.game_map
+        density = game_map.halite_density(DROPOFF_RADIUS)
+        places = self.dropoff_places(WARM_UP_DROPOFF_PLACES)
+        logging.info("Best dropoff places at start: %s",
+                     [(game_map.position_at(index), density[index]) for index in places])
+
+
+    def precompute(self):
+        """
+        Runs in the background after every turn: computes the map fields the next turn will probably need,
+        from the state of the turn that just ended. Must not change anything.
+        """
+        if self.me is None:
+            return
+        game_map = self.game.game_map
+        if any(ship.halite_amount >= constants.MAX_HALITE * 0.8 for ship in self.my_ships) \
+                or constants.MAX_TURNS - self.game.turn_number < (game_map.width + game_map.height) // 2 + 12:
+            # ships about to go home
+            game_map.return_field(self.me.id)
+        if self.game.turn_number >= 49 and not self.me.get_dropoffs() \
+                and self.me.halite_amount >= constants.DROPOFF_COST - constants.SHIP_COST:
+            # construct_dropoff is about to look for a place
+            game_map.halite_density(DROPOFF_RADIUS)
 
 
     def build_ship(self):
         if self.game.turn_number <= self.SHIP_BUILD_MAX_TURN and len(self.my_ships) <= MAX_OWN_SHIPS \
                 and self.me.halite_amount >= constants.SHIP_COST \
-                and not self.game_map[self.me.shipyard].is_occupied:
+                and not self.navigator.is_reserved(self.me.shipyard.position) \
+                and self.game_map.ship_owner[self.game_map.index(self.me.shipyard.position)] in (-1, self.me.id):
             self.command_queue.append(self.me.shipyard.spawn())
 
 
@@ -101,8 +169,8 @@ class Bot:
         # if turn is in (300;340] AND there is NO ships in the enemy shipyard, then don't attack
         # it means that enemy is killing this ships
         if 300 < self.game.turn_number <= 340 or min_distance == 0:
-            move = self.game_map.naive_navigate(closest_ship, enemy.shipyard.position)
-            self.command_queue.append(closest_ship.move(move))
+            moves = self.game_map.get_unsafe_moves(closest_ship.position, enemy.shipyard.position)
+            self.navigator.request(closest_ship, moves)
             self.my_ships = list(filter(lambda x: x.id != closest_ship.id, self.my_ships))
             # logging.info("Final list %s" % self.my_ships)
 
@@ -114,26 +182,19 @@ class Bot:
                 or self.me.halite_amount < constants.DROPOFF_COST:
             return
 
-        # scan all position and find a closest to shipyard closest with max halite
-        closest_cand = None
-        closest_dist = 9999
-        max_halite = 0
-        for w in range(0, self.game_map.width):
-            for h in range(0, self.game_map.height):
-                p = Position(w, h)
-                closest_dropoff = self.find_closest_dropoff(p, True, True)
-                dist = self.game_map.calculate_distance(p, closest_dropoff.position)
-                if dist < MIN_DROPOFF_DIST:
-                    continue
-                halite = self.game_map[p].halite_amount
-                if halite > max_halite or (halite == max_halite and dist < closest_dist):
-                    logging.info("New candidate dist %s with pos %s with halite %s" % (dist, p, halite))
-                    closest_cand = p
-                    closest_dist = dist
-                    max_halite = halite
-
-        if not closest_cand:
+        if self.game.deadline.expired(DROPOFF_SCAN_RESERVE):
+            logging.info("No time left to look for a dropoff place")
+            return
+
+        places = self.dropoff_places(1)
+        if not places:
             return
+        best = places[0]
+        density = self.game_map.halite_density(DROPOFF_RADIUS)
+        if density[best] == 0:
+            return
+        closest_cand = self.game_map.position_at(best)
+        logging.info("Dropoff candidate %s with %s halite around", closest_cand, density[best])
 
         # pick closest ship to that position
         closest_ship = self.my_ships[0]
@@ -141,125 +202,79 @@ class Bot:
         for ship in self.my_ships:
             dist = self.game_map.calculate_distance(ship.position, closest_cand)
             if dist < closest_dist:
-                logging.info("New ship dist %s with pos %s" % (dist, ship.position))
+                logging.info("New ship dist %s with pos %s", dist, ship.position)
                 closest_ship = ship
                 closest_dist = dist
 
         # move there
         if closest_dist != 0:
-            move = self.game_map.naive_navigate(closest_ship, closest_cand)
-            self.command_queue.append(closest_ship.move(move))
+            self.navigator.request(closest_ship, self.game_map.get_unsafe_moves(closest_ship.position, closest_cand))
             self.my_ships = list(filter(lambda x: x.id != closest_ship.id, self.my_ships))
             return
 
         # if we are there, try to build a dropoff
-        logging.info("Ship %s is making dropoff" % closest_ship)
+        logging.info("Ship %s is making dropoff", closest_ship)
         self.command_queue.append(closest_ship.make_dropoff())
         self.my_ships = list(filter(lambda x: x.id != closest_ship.id, self.my_ships))
 
 
-    def collect(self, ship):
-        max_halite = self.game_map[ship.position].halite_amount * 2
-        pos_choices = [{
-            'position': ship.position,
-            'direction': Direction.Still,
-            'halite': max_halite
-        }]
-        for direction, position in zip(DIRECTIONS, ship.position.get_surrounding_cardinals()):
-            # logging.info("Ship %s pos %s state %s" % (ship, position, game_map[position].is_occupied))
-            if self.game_map[position].is_occupied:
-                continue
-            pos_choices.append({
-                'position': position,
-                'direction': direction,
-                'halite': self.game_map[position].halite_amount
-            })
-            if max_halite < self.game_map[position].halite_amount:
-                max_halite = self.game_map[position].halite_amount
-                # logging.info("New max halite: %s" % max_halite)
-
-        # pos_choices = [ship.position] + pos_choices
-        # halite_choices = list(map(lambda x: game_map[x].halite_amount, pos_choices))
-        # halite_choices[0] *= 2  # we prefer to stand still
-        # logging.info(pos_choices)
-
-        best_moves = list(filter(lambda x: x['halite'] == max_halite, pos_choices))
-        if len(best_moves) > 1:
-            logging.info("Multiple best moves: %s" % best_moves)
-            best_move = random.choice(best_moves)
-            logging.info("Random best move: %s" % best_move)
-        else:
-            best_move = best_moves[0]
-
-        # mark next move of this ship as occupied
-        self.game_map[best_move['position']].ship = Ship(self.me, random.randint(1000, 10000), ship.position, 0)
-        # game_map[best_move['position']].ship = ship
-
-        # if max_halite['direction'] != Direction.Still:
-        #     # mark this position as empty, because we will move away from it next move
-        #     game_map[ship.position].ship = None
-        # return best move
-        # logging.info("Ship %s move %s" % (ship, best_move['position']))
-
-        return best_move['direction']
+    def dropoff_places(self, count):
+        """
+        :return: the layer indices of the count richest regions far enough from every structure, best first and
+            the closest one on ties
+        """
+        game_map = self.game.game_map
+        density = game_map.halite_density(DROPOFF_RADIUS)
+        # distance to the closest structure of any player
+        structure_dist = game_map.structure_field()[0]
+        candidates = [index for index, dist in enumerate(structure_dist) if dist >= MIN_DROPOFF_DIST]
+        return heapq.nlargest(count, candidates, key=lambda index: (density[index], -structure_dist[index]))
 
 
-    def drop_halite(self, ship, force=False):
+    def collect(self, ships):
+        """
+        :return: for every ship, the directions ranked by the halite mined on the destination minus the halite
+            burned to get there (staying counts double)
+        """
+        origins = [self.game_map.index(ship.position) for ship in ships]
+        return rank_mining_moves(self.game_map, self.me.id, origins)
 
-        dropoffs = self.me.get_dropoffs()
-        if len(dropoffs):
-            drop_pos = dropoffs[0].position
-        else:
-            drop_pos = self.me.shipyard.position
+
+    def drop_halite(self, ship, force=False):
+        """
+        :return: directions towards the closest dropoff, by the cheapest of the shortest ways, and staying still
+            as the fallback
+        """
+        drop_pos = self.find_closest_dropoff(ship.position).position
+        burn, _, directions = self.game_map.return_field(self.me.id)
 
         if force is False:
-            if self.game_map[drop_pos].ship and self.game_map[drop_pos].ship.owner != self.me:
-                # attack enemy in my dropoff
-                self.game_map[drop_pos].ship = None
-            move = self.game_map.naive_navigate(ship, drop_pos)
-        else:
-            # we don't care where to go suicide, so we can change destination to closes one
-            drop_pos = self.find_closest_dropoff(ship.position).position
-            # set dropoff/shipyard as empty
-            self.game_map[drop_pos].ship = None
-            move = self.game_map.naive_navigate(ship, drop_pos)
-
-        # make it unsafe to
-        # logging.info("Current %s move %s next pos %s" % (ship.position, move, ship.position + Position(*move)))
-        # FIXME: rewrite navigation and remove this dummy creation
-        self.game_map[ship.position + Position(*move)].ship = Ship(self.me, random.randint(1000, 10000),
-                                                              ship.position + Position(*move), 0)
-        # game_map[ship.position].ship = None
-        return move
+            # attack enemy in my dropoff
+            self.navigator.unblock(drop_pos)
+            self.planner.unblock(drop_pos)
+            # queue up with the other returning ships instead of jamming the dropoff, on the path reserved for us
+            return self.planner.plan(ship, drop_pos, burn) + [Direction.Still]
+
+        # our ships can crash into each other on the dropoff/shipyard
+        self.navigator.allow_collisions(drop_pos)
+        cheapest = directions[self.game_map.index(ship.position)]
+        first = [cheapest] if cheapest is not None else []
+        return first + self.game_map.get_unsafe_moves(ship.position, drop_pos) + [Direction.Still]
 
 
     def is_end_game(self, ship):
-        closest = self.find_closest_dropoff(ship.position)
-        home_dist = self.game_map.calculate_distance(ship.position, closest.position)
-        res = home_dist + 10 > (constants.MAX_TURNS - self.game.turn_number)
+        turns_left = constants.MAX_TURNS - self.game.turn_number
+        if turns_left >= (self.game_map.width + self.game_map.height) // 2 + 10:
+            # every cell is closer to home than that, no need for the return field yet
+            return False
+        home_steps = self.game_map.return_field(self.me.id)[1][self.game_map.index(ship.position)]
+        res = home_steps + 10 > turns_left
         return res
 
 
-    def find_closest_dropoff(self, position, with_shipyard=True, with_enemy=False):
-        dropoffs = self.me.get_dropoffs()
-        if with_shipyard:
-            dropoffs.append(self.me.shipyard)
-        if with_enemy:
-            for e in self.enemies:
-                dropoffs += e.get_dropoffs()
-                dropoffs.append(e.shipyard)
-            logging.info("Final list of dropoffs %s" % dropoffs)
-
-        closest_dist = 9999
-        closest_dropoff = dropoffs[0]
-        for d in dropoffs:
-            dist = self.game_map.calculate_distance(position, d.position)
-            if dist < closest_dist:
-                # logging.info("Closest dropoff %s for ship %s" % (d, ship))
-                closest_dist = dist
-                closest_dropoff = d
-
-        return closest_dropoff
+    def find_closest_dropoff(self, position, with_enemy=False):
+        player_id = None if with_enemy else self.me.id
+        return self.game_map.nearest_structure(position, player_id)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# Python 3.6
+"""
+Micro-benchmarks for the hot paths of hlt and MyBot.
+
+    python3 benchmarks/bench_hlt.py [--sizes 32 48 64] [--players 2 4] [--turns 60] [--limit 2.0]
+
+Boards, ships and frames are synthetic (seeded, so runs are comparable). Each line reports the mean and
+the worst time of one call. The "turn" benchmarks time a whole bot turn, and the script exits with status 1
+when a turn gets over --limit seconds, so it can guard a bot version before it ships.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import hlt
+from hlt import constants
+from hlt.common import read_frame
+from hlt.game_map import GameMap
+from hlt.navigation import Navigator
+from hlt.positionals import Direction, Position
+from hlt.replay import Replay
+from hlt.timing import TURN_TIME_LIMIT
+import MyBot
+
+GAME_CONSTANTS = {
+    'NEW_ENTITY_ENERGY_COST': 1000, 'DROPOFF_COST': 4000, 'MAX_ENERGY': 1000, 'MAX_TURNS': 400,
+    'EXTRACT_RATIO': 4, 'MOVE_COST_RATIO': 10, 'INSPIRATION_ENABLED': True, 'INSPIRATION_RADIUS': 4,
+    'INSPIRATION_SHIP_COUNT': 2, 'INSPIRED_EXTRACT_RATIO': 4, 'INSPIRED_BONUS_MULTIPLIER': 2.0,
+    'INSPIRED_MOVE_COST_RATIO': 10, 'INITIAL_ENERGY': 5000,
+}
+
+
+def synthetic_replay(size, num_players, turns, ships_per_player, seed=0):
+    """
+    Builds a replay-shaped game: random halite, shipyards spread over the map and ships that
+    wander around, mining a bit of the cells they leave.
+    :return: A Replay object
+    """
+    rng = random.Random(seed)
+    grid = [[rng.randint(0, 1000) for _ in range(size)] for _ in range(size)]
+    initial = [list(row) for row in grid]
+    corners = [(size // 4, size // 4), (3 * size // 4, 3 * size // 4),
+               (3 * size // 4, size // 4), (size // 4, 3 * size // 4)]
+    players = [{'player_id': player_id, 'name': 'bench-{}'.format(player_id), 'energy': 0, 'entities': [],
+                'factory_location': {'x': corners[player_id][0], 'y': corners[player_id][1]}}
+               for player_id in range(num_players)]
+    ships = {player_id: {} for player_id in range(num_players)}
+    frames = [{'cells': [], 'energy': {}, 'entities': {}, 'events': [], 'moves': {}}]
+    occupied = set()
+    for turn_number in range(1, turns + 1):
+        cells = []
+        for player_id in range(num_players):
+            if len(ships[player_id]) < ships_per_player and corners[player_id] not in occupied:
+                ship_id = player_id * 1000 + len(ships[player_id])
+                ships[player_id][ship_id] = list(corners[player_id]) + [0]
+                occupied.add(corners[player_id])
+            for ship in ships[player_id].values():
+                dx, dy = rng.choice([(0, -1), (0, 1), (1, 0), (-1, 0), (0, 0)])
+                target = ((ship[0] + dx) % size, (ship[1] + dy) % size)
+                if dx == dy == 0 or target in occupied:
+                    mined = grid[ship[1]][ship[0]] // 4
+                    grid[ship[1]][ship[0]] -= mined
+                    ship[2] = min(1000, ship[2] + mined)
+                    cells.append({'x': ship[0], 'y': ship[1], 'production': grid[ship[1]][ship[0]]})
+                    continue
+                occupied.discard((ship[0], ship[1]))
+                occupied.add(target)
+                ship[0], ship[1] = target
+        frames.append({
+            'cells': cells, 'events': [], 'moves': {},
+            'energy': {str(player_id): 20000 for player_id in range(num_players)},
+            'entities': {str(player_id): {str(ship_id): {'x': x, 'y': y, 'energy': cargo, 'is_inspired': False}
+                                          for ship_id, (x, y, cargo) in ships[player_id].items()}
+                         for player_id in range(num_players)},
+        })
+    return Replay({
+        'GAME_CONSTANTS': GAME_CONSTANTS,
+        'players': players,
+        'production_map': {'width': size, 'height': size,
+                           'grid': [[{'energy': halite} for halite in row] for row in initial]},
+        'full_frames': frames,
+    })
+
+
+def engine_input(replay):
+    """
+    Serializes a replay the way the engine sends it to a bot.
+    :return: A pair (init bytes, list of frame bytes)
+    """
+    lines = [json.dumps(replay.constants), '{} 0'.format(len(replay.names))]
+    for player in replay.data['players']:
+        lines.append('{} {} {}'.format(player['player_id'], player['factory_location']['x'],
+                                       player['factory_location']['y']))
+    lines.append('{} {}'.format(replay.width, replay.height))
+    lines += [' '.join(map(str, row)) for row in replay.halite_rows()]
+    init = ('\n'.join(lines) + '\n').encode()
+
+    frames = []
+    for turn_number, players, cells in replay.frames():
+        lines = [str(turn_number)]
+        for player_id, halite, ships, dropoffs in players:
+            lines.append('{} {} {} {}'.format(player_id, len(ships) // 4, len(dropoffs) // 3, halite))
+            lines += ['{} {} {} {}'.format(*ships[i:i + 4]) for i in range(0, len(ships), 4)]
+            lines += ['{} {} {}'.format(*dropoffs[i:i + 3]) for i in range(0, len(dropoffs), 3)]
+        lines.append(str(len(cells) // 3))
+        lines += ['{} {} {}'.format(*cells[i:i + 3]) for i in range(0, len(cells), 3)]
+        frames.append(('\n'.join(lines) + '\n').encode())
+    return init, frames
+
+
+def stdin_from(data):
+    """Points sys.stdin at a bytes payload, the way the engine pipe would deliver it."""
+    sys.stdin = io.TextIOWrapper(io.BytesIO(data))
+
+
+def measure(function, repeat):
+    """
+    :return: (mean, worst) seconds of one call over repeat calls
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return sum(timings) / len(timings), max(timings)
+
+
+def report(name, size, num_players, repeat, timings):
+    mean, worst = timings
+    print('{:<28} {:>2}x{:<2} {}p {:>6} calls  mean {:>9.3f} ms  max {:>9.3f} ms'.format(
+        name, size, size, num_players, repeat, mean * 1000, worst * 1000))
+
+
+def bench_board(size, num_players, turns, ships_per_player, repeat):
+    """
+    Runs every benchmark on one board configuration.
+    :return: The worst whole-turn time in seconds
+    """
+    replay = synthetic_replay(size, num_players, turns, ships_per_player, seed=size * 10 + num_players)
+    init, frames = engine_input(replay)
+    constants.load_constants(replay.constants)
+
+    # Parsing and map construction, through the stdin code path
+    header_end = init.index(b'\n', init.index(b'\n') + 1) + 1
+    map_input = init[header_end:].split(b'\n', num_players)[-1]
+
+    def generate():
+        stdin_from(map_input)
+        return GameMap._generate()
+    report('GameMap._generate', size, num_players, repeat, measure(generate, repeat))
+
+    game_map = generate()
+    last_frame = frames[-1]
+
+    def parse():
+        stdin_from(last_frame)
+        return read_frame(num_players)
+    report('read_frame', size, num_players, repeat, measure(parse, repeat))
+
+    turn_number, players, cells = parse()
+    player = hlt.player.Player(0, hlt.entity.Shipyard(0, -1, Position(0, 0)))
+    report('Player._update', size, num_players, repeat,
+           measure(lambda: player._update(players[0][1], players[0][2], players[0][3]), repeat))
+    report('GameMap._update', size, num_players, repeat, measure(lambda: game_map._update(cells), repeat))
+
+    # Geometry
+    rng = random.Random(size)
+    pairs = [(Position(rng.randrange(size), rng.randrange(size)), Position(rng.randrange(size), rng.randrange(size)))
+             for _ in range(1000)]
+    report('calculate_distance x1000', size, num_players, repeat,
+           measure(lambda: [game_map.calculate_distance(a, b) for a, b in pairs], repeat))
+    report('Position arithmetic x1000', size, num_players, repeat,
+           measure(lambda: [hash(a + b - a) ^ hash(a.directional_offset(Direction.North)) for a, b in pairs], repeat))
+    report('distance_field', size, num_players, repeat, measure(lambda: game_map.distance_field(pairs[0][0]), repeat))
+
+    # Bot decisions on the state of the last synthetic turn
+    game = replay.game(0)
+    for _ in game.turns():
+        pass
+    bot = MyBot.Bot(game)
+    bot.me, bot.game_map = game.me, game.game_map
+    bot.enemies = game.enemies()
+    ships = game.me.get_ships()
+
+    def navigate():
+        for ship, (_, target) in zip(ships, pairs):
+            bot.game_map.naive_navigate(ship, target)
+    report('naive_navigate per ship', size, num_players, repeat,
+           _per_item(measure(navigate, repeat), len(ships)))
+
+    def construct_dropoff():
+        bot.my_ships = list(ships)
+        bot.navigator = Navigator(game.game_map, game.my_id)
+        bot.construct_dropoff()
+    report('Bot.construct_dropoff', size, num_players, repeat, measure(construct_dropoff, repeat))
+
+    def collect():
+        bot.navigator = Navigator(game.game_map, game.my_id)
+        for ship, directions in zip(ships, bot.collect(ships)):
+            bot.navigator.request(ship, directions)
+        bot.navigator.resolve()
+    report('Bot.collect+resolve per ship', size, num_players, repeat,
+           _per_item(measure(collect, repeat), len(ships)))
+
+    # Whole turns, frame by frame
+    game = replay.game(0)
+    bot = MyBot.Bot(game)
+    update_timings, turn_timings = [], []
+    for _ in range(replay.num_turns):
+        update_timings.append(measure(bot.update_frame, 1)[0])
+        turn_timings.append(measure(bot.play_turn, 1)[0])
+    report('turn: update_frame', size, num_players, len(update_timings),
+           (sum(update_timings) / len(update_timings), max(update_timings)))
+    whole = [update + turn for update, turn in zip(update_timings, turn_timings)]
+    report('turn: total', size, num_players, len(whole), (sum(whole) / len(whole), max(whole)))
+    return max(whole)
+
+
+def _per_item(timings, count):
+    return tuple(timing / max(count, 1) for timing in timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the hlt hot paths on synthetic boards")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[32, 48, 64])
+    parser.add_argument('--players', type=int, nargs='+', default=[2, 4])
+    parser.add_argument('--turns', type=int, default=60, help="synthetic turns per board")
+    parser.add_argument('--ships', type=int, default=50, help="ships per player")
+    parser.add_argument('--repeat', type=int, default=20, help="calls per benchmark")
+    parser.add_argument('--limit', type=float, default=TURN_TIME_LIMIT, help="fail when a turn is slower (seconds)")
+    args = parser.parse_args()
+
+    stdin = sys.stdin
+    worst = 0
+    try:
+        for size in args.sizes:
+            for num_players in args.players:
+                worst = max(worst, bench_board(size, num_players, args.turns, args.ships, args.repeat))
+    finally:
+        sys.stdin = stdin
+
+    print('worst turn {:.3f} s, limit {:.3f} s'.format(worst, args.limit))
+    if worst > args.limit:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
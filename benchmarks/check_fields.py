@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# Python 3.6
+"""
+Checks the halite fields GameMap patches from frame to frame against fields computed from scratch.
+
+    python3 benchmarks/check_fields.py [--maps 30] [--turns 5] [--seed 0]
+
+GameMap._update patches the cached halite densities and repairs the return fields with the cells that changed
+(see GameMap._patch_halite_caches) instead of computing them again. On random maps this script reads the fields,
+applies random frames, and compares the patched fields with the ones of a fresh map holding the same halite and
+structures. It exits with status 1 on the first difference, so it can guard changes to the patching code.
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from hlt import constants
+from hlt.entity import Dropoff, Shipyard
+from hlt.game_map import GameMap
+from hlt.simulator import GAME_CONSTANTS
+
+
+def fresh_copy(game_map):
+    """
+    :return: A new map with the halite and the structures of game_map, and nothing cached
+    """
+    width = game_map.width
+    copy = GameMap._from_halite([game_map.halite[y * width:(y + 1) * width].tolist()
+                                 for y in range(game_map.height)])
+    for index, owner in enumerate(game_map.structure_owner):
+        if owner != -1:
+            copy._mark_structure(Dropoff(owner, index, game_map.position_at(index)))
+    return copy
+
+
+def random_frame(rng, game_map):
+    """
+    :return: The cells of a frame changing a random share of the map, sometimes above the patching threshold
+    """
+    cells = []
+    for _ in range(rng.randrange(0, max(2, game_map.width * game_map.height // 10))):
+        cells += [rng.randrange(game_map.width), rng.randrange(game_map.height), rng.randrange(1000)]
+    return cells
+
+
+def check_map(rng, turns):
+    """
+    Plays random frames on one random map.
+    :return: A description of the first difference, None if the patched fields are right
+    """
+    width, height = rng.choice([6, 9, 16, 32]), rng.choice([6, 11, 32])
+    game_map = GameMap._from_halite([[rng.randrange(1000) for _ in range(width)] for _ in range(height)])
+    game_map._mark_structure(Shipyard(0, -1, game_map.position_at(rng.randrange(width * height))))
+    game_map._mark_structure(Shipyard(1, -1, game_map.position_at(rng.randrange(width * height))))
+    radii = {rng.randrange(0, 7), 3}
+
+    for turn in range(turns):
+        # read the fields, so that the next update patches them
+        for radius in radii:
+            game_map.halite_density(radius)
+        for player_id in (0, 1):
+            game_map.return_field(player_id)
+        if rng.random() < 0.2:
+            game_map._mark_structure(Dropoff(0, turn, game_map.position_at(rng.randrange(width * height))))
+        game_map._update(random_frame(rng, game_map))
+
+        expected = fresh_copy(game_map)
+        case = '{}x{} map, turn {}'.format(width, height, turn)
+        for radius in radii:
+            if game_map.halite_density(radius) != expected.halite_density(radius):
+                return '{}: halite_density({}) differs'.format(case, radius)
+        for player_id in (0, 1):
+            burn, steps, directions = game_map.return_field(player_id)
+            expected_burn, expected_steps, _ = expected.return_field(player_id)
+            if burn != expected_burn or steps != expected_steps:
+                return '{}: return_field({}) differs'.format(case, player_id)
+            for index, direction in enumerate(directions):
+                if direction is None:
+                    continue
+                # the first move must lead on a way home of the same steps and burn
+                step = game_map.index(game_map.directional_offset(game_map.position_at(index), direction))
+                if steps[step] + 1 != steps[index] or \
+                        burn[step] + game_map.halite[index] // constants.MOVE_COST_RATIO != burn[index]:
+                    return '{}: return_field({}) direction of cell {} is not on its way home'.format(
+                        case, player_id, index)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the patched halite fields against fresh computations")
+    parser.add_argument('--maps', type=int, default=30, help="random maps to play")
+    parser.add_argument('--turns', type=int, default=5, help="random frames per map")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    constants.load_constants(GAME_CONSTANTS)
+    rng = random.Random(args.seed)
+    for map_number in range(args.maps):
+        error = check_map(rng, args.turns)
+        if error is not None:
+            print('map {}: {}'.format(map_number, error))
+            sys.exit(1)
+    print('{} maps, {} frames each: the patched fields match'.format(args.maps, args.turns))
+
+
+if __name__ == "__main__":
+    main()
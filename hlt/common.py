@@ -1,11 +1,92 @@
+import logging
+import sys
+import threading
+
+# Per thread replacement of the engine pipe, see set_connection
+_local = threading.local()
+
+
+def set_connection(connection):
+    """
+    Makes the bot running in the current thread talk to connection instead of stdin/stdout.
+
+    The connection provides read_input(), read_ints(lines), read_frame(num_players) and send_commands(commands)
+    with the same results as the functions of this module, e.g. an in-process simulator can hand over parsed frames
+    without serializing them. Pass None to go back to stdin/stdout.
+    :param connection: The object to talk to, or None
+    """
+    _local.connection = connection
+
+
+def get_connection():
+    """
+    :return: The connection used by the current thread, None for stdin/stdout
+    """
+    return getattr(_local, 'connection', None)
+
+
 # Placed here to avoid circular imports
 def read_input():
     """
     Reads input from stdin, shutting down logging and exiting if an EOFError occurs
     :return: input read
     """
-    try:
-        return input()
-    except EOFError as eof:
+    connection = getattr(_local, 'connection', None)
+    if connection is not None:
+        return connection.read_input()
+    stream = getattr(sys.stdin, 'buffer', None)
+    if stream is None:
+        try:
+            return input()
+        except EOFError as eof:
+            logging.shutdown()
+            raise SystemExit(eof)
+    line = stream.readline()
+    if not line:
         logging.shutdown()
-        raise SystemExit(eof)
+        raise SystemExit(EOFError("EOF when reading a line"))
+    return line.rstrip(b'\r\n').decode()
+
+
+def read_ints(lines):
+    """
+    Reads a block of lines from stdin in one go and parses every number in it
+    :param lines: How many lines to read
+    :return: A flat list with the integers of all lines, in order
+    """
+    if lines <= 0:
+        return []
+    connection = getattr(_local, 'connection', None)
+    if connection is not None:
+        return connection.read_ints(lines)
+    stream = getattr(sys.stdin, 'buffer', None)
+    if stream is None:
+        # Line protocol fallback when stdin is not backed by a binary buffer
+        return [int(value) for _ in range(lines) for value in read_input().split()]
+    readline = stream.readline
+    chunks = [readline() for _ in range(lines)]
+    if not chunks[-1]:
+        logging.shutdown()
+        raise SystemExit(EOFError("EOF when reading a line"))
+    return list(map(int, b' '.join(chunks).split()))
+
+
+def read_frame(num_players):
+    """
+    Reads the input of a whole turn from the game engine
+    :param num_players: How many players are in the game
+    :return: A tuple (turn_number, players, cells) where players is a list of
+        (player_id, halite, ships, dropoffs) and ships ([id, x, y, halite, ...]),
+        dropoffs ([id, x, y, ...]) and cells ([x, y, halite, ...]) are flat integer lists
+    """
+    connection = getattr(_local, 'connection', None)
+    if connection is not None:
+        return connection.read_frame(num_players)
+    turn_number = int(read_input())
+    players = []
+    for _ in range(num_players):
+        player_id, num_ships, num_dropoffs, halite = map(int, read_input().split())
+        entities = read_ints(num_ships + num_dropoffs)
+        players.append((player_id, halite, entities[:num_ships * 4], entities[num_ships * 4:]))
+    cells = read_ints(int(read_input()))
+    return turn_number, players, cells
@@ -1,14 +1,16 @@
-import abc
-
 from . import commands, constants
 from .positionals import Direction, Position
 from .common import read_input
 
 
-class Entity(abc.ABC):
+class Entity:
     """
     Base Entity Class from whence Ships, Dropoffs and Shipyards inherit
+
+    Entities are slotted: a 4 player game holds hundreds of them and Player._update keeps them from turn to turn.
     """
+    __slots__ = ('owner', 'id', 'position')
+
     def __init__(self, owner, id, position):
         self.owner = owner
         self.id = id
@@ -34,13 +36,15 @@ class Dropoff(Entity):
     """
     Dropoff class for housing dropoffs
     """
-    pass
+    __slots__ = ()
 
 
 class Shipyard(Entity):
     """
     Shipyard class to house shipyards
     """
+    __slots__ = ()
+
     def spawn(self):
         """Return a move to spawn a new ship."""
         return commands.GENERATE
@@ -50,6 +54,8 @@ class Ship(Entity):
     """
     Ship class to house ship entities
     """
+    __slots__ = ('halite_amount',)
+
     def __init__(self, owner, id, position, halite_amount):
         super().__init__(owner, id, position)
         self.halite_amount = halite_amount
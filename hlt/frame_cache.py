@@ -0,0 +1,64 @@
+"""
+Values derived from the state of a turn, computed at most once per turn.
+
+Game owns a FrameCache (game.cache) and empties it whenever a frame is applied, so entries never outlive the turn
+they were computed for. Any code can store its own derived values in it:
+
+    field = game.cache.get(('distance', index), lambda: game.game_map.distance_field(position))
+
+and Game methods built on the frame are memoized with the frame_cached decorator (see Game.enemies,
+Game.enemy_ships and Game.structures). Cached values are shared by every caller of the turn: Game returns them
+as tuples, and anything else stored in the cache must be treated as read-only.
+"""
+import functools
+
+_MISSING = object()
+
+
+class FrameCache:
+    """
+    A dict of the values computed during the current turn.
+    """
+    def __init__(self):
+        self._values = {}
+
+    def get(self, key, compute):
+        """
+        :param key: A hashable key naming the value, e.g. ('distance', index)
+        :param compute: A callable without arguments computing the value, only called on the first get of the turn
+        :return: The value of this turn
+        """
+        value = self._values.get(key, _MISSING)
+        if value is _MISSING:
+            value = self._values[key] = compute()
+        return value
+
+    def clear(self):
+        """
+        Forgets every value, called by Game when a new frame is applied.
+        :return: nothing.
+        """
+        self._values.clear()
+
+    def __contains__(self, key):
+        return key in self._values
+
+    def __len__(self):
+        return len(self._values)
+
+
+def frame_cached(method):
+    """
+    Memoizes a method of an object holding a FrameCache in self.cache until the next frame, per arguments.
+    :param method: The method to memoize, its arguments must be hashable
+    :return: The memoized method
+    """
+    name = method.__name__
+
+    @functools.wraps(method)
+    def cached(self, *args, **kwargs):
+        key = (name,) + args
+        if kwargs:
+            key += tuple(sorted(kwargs.items()))
+        return self.cache.get(key, lambda: method(self, *args, **kwargs))
+    return cached
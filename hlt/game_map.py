@@ -1,3 +1,4 @@
+import array
 import queue
 
 from . import constants
@@ -6,14 +7,72 @@ from .player import Player
 from .positionals import Direction, Position
 from .common import read_input
 
+# Position of each cardinal in Direction.get_all_cardinals()
+_CARDINAL_INDEX = {direction: index for index, direction in enumerate(Direction.get_all_cardinals())}
+
+# The cached halite fields are patched when at most 1 / _PATCH_RATIO of the cells changed, computed again otherwise
+_PATCH_RATIO = 16
+
 
 class MapCell:
-    """A cell on the game map."""
-    def __init__(self, position, halite_amount):
-        self.position = position
-        self.halite_amount = halite_amount
-        self.ship = None
-        self.structure = None
+    """
+    A cell on the game map.
+
+    Cells are views created on demand by GameMap.__getitem__: the halite, the ship and the structure of a cell
+    live in the layers of its map, so two views of the same cell see the same state.
+    """
+    __slots__ = ('_map', '_index')
+
+    def __init__(self, game_map, index):
+        """
+        :param game_map: The GameMap holding the cell
+        :param index: The flat index of the cell in the map layers
+        """
+        self._map = game_map
+        self._index = index
+
+    @property
+    def position(self):
+        """
+        :return: The canonical position of this cell
+        """
+        return self._map._positions[self._index]
+
+    @property
+    def halite_amount(self):
+        """
+        :return: The halite on this cell
+        """
+        return self._map.halite[self._index]
+
+    @halite_amount.setter
+    def halite_amount(self, halite_amount):
+        self._map._set_halite(self._index, halite_amount)
+
+    @property
+    def ship(self):
+        """
+        :return: The ship on this cell, or whatever was marked unsafe here this turn
+        """
+        return self._map._ship_refs[self._index]
+
+    @ship.setter
+    def ship(self, ship):
+        refs = self._map._ship_refs
+        if ship is not None and refs[self._index] is None:
+            self._map._marked_refs.append(self._index)
+        refs[self._index] = ship
+
+    @property
+    def structure(self):
+        """
+        :return: The shipyard or dropoff on this cell, None if there is none
+        """
+        return self._map._structure_refs[self._index]
+
+    @structure.setter
+    def structure(self, structure):
+        self._map._structure_refs[self._index] = structure
 
     @property
     def is_empty(self):
@@ -67,11 +126,82 @@ class GameMap:
 
     Can be indexed by a position, or by a contained entity.
     Coordinates start at 0. Coordinates are normalized for you
+
+    The state of the cells is kept in flat row-major layers (index = y * width + x), which whole-board scans
+    read directly:
+        halite          -- int32 halite amount of every cell
+        ship_owner      -- owner id of the ship on every cell, -1 if there is none
+        structure_owner -- owner id of the shipyard/dropoff on every cell, -1 if there is none
+    The layers reflect the state sent by the engine; navigation marks (mark_unsafe) only go to the ship
+    references that the MapCell views read. Indexing the map creates such a view.
+
+    dx_table[d] and dy_table[d] hold the wrap-around distance for a coordinate difference d (taken modulo
+    width/height), so distances are table lookups.
+
+    Every cell has one canonical Position object; normalize, position_at, directional_offset and
+    get_surrounding_cardinals return those shared objects instead of allocating new ones.
+
+    structure_field gives the distance to the nearest shipyard/dropoff for every cell. It is cached
+    and only recomputed when a new structure shows up.
+
+    inspiration_field counts the opponent ships around every cell. It is computed at most once per turn and
+    player, from the ship_owner layer.
+
+    halite_density sums the halite around every cell. It is cached until the halite layer changes.
+
+    return_field gives the cheapest of the shortest ways home (in halite burned) from every cell. It is cached
+    until the halite layer or the structures change.
+
+    warm_up fills these caches ahead of the first turn.
     """
-    def __init__(self, cells, width, height):
+    def __init__(self, halite, width, height):
+        """
+        :param halite: The halite of every cell, as a flat row-major list
+        :param width: The map width
+        :param height: The map height
+        """
         self.width = width
         self.height = height
-        self._cells = cells
+        self.halite = array.array('i', halite)
+        self.ship_owner = array.array('b', [-1]) * (width * height)
+        self.structure_owner = array.array('b', [-1]) * (width * height)
+        # What the MapCell views return as ship (engine ships and navigation marks) and structure
+        self._ship_refs = [None] * (width * height)
+        self._structure_refs = [None] * (width * height)
+        # _ship_refs and ship_owner indices marked since the last _update, so resetting occupancy
+        # costs as much as the number of ships instead of the map area
+        self._marked_refs = []
+        self._marked_indices = []
+        self.dx_table = [min(d, width - d) for d in range(width)]
+        self.dy_table = [min(d, height - d) for d in range(height)]
+        self._positions = [Position(x, y) for y in range(height) for x in range(width)]
+        # Normalized neighbours of every cell, in Direction.get_all_cardinals() order
+        area = width * height
+        columns = list(range(width))
+        east = columns[1:] + columns[:1]
+        west = columns[-1:] + columns[:-1]
+        self._neighbour_indices = list(zip(
+            [(index - width) % area for index in range(area)],
+            [(index + width) % area for index in range(area)],
+            [row + x for row in range(0, area, width) for x in east],
+            [row + x for row in range(0, area, width) for x in west],
+        ))
+        positions = self._positions
+        self._neighbours = [(positions[north], positions[south], positions[east], positions[west])
+                            for north, south, east, west in self._neighbour_indices]
+        # player id (None for everybody) -> (distances, nearest) computed by structure_field
+        self._structure_fields = {}
+        # player id -> opponent ship counts computed by inspiration_field, reset every turn
+        self._inspiration_fields = {}
+        # radius -> (columns, rows) windows of the diamonds, see _diamond
+        self._diamonds = {}
+        # Bumped whenever the halite layer changes, radius -> (version, densities) computed by halite_density
+        self._halite_version = 0
+        self._densities = {}
+        # player id -> (halite version, field) computed by return_field
+        self._return_fields = {}
+        # The densities and return fields read since the last _update, the only ones worth patching
+        self._used_fields = set()
 
     def __getitem__(self, location):
         """
@@ -80,12 +210,45 @@ class GameMap:
         :return: the contents housing that cell or entity
         """
         if isinstance(location, Position):
-            location = self.normalize(location)
-            return self._cells[location.y][location.x]
+            return MapCell(self, (location.y % self.height) * self.width + location.x % self.width)
         elif isinstance(location, Entity):
-            return self._cells[location.position.y][location.position.x]
+            return MapCell(self, location.position.y * self.width + location.position.x)
         return None
 
+    def index(self, position):
+        """
+        Flat index of a position in the map layers. Accounts for wrap-around.
+        :param position: The position to convert
+        :return: The index of that position in halite, ship_owner and structure_owner
+        """
+        return (position.y % self.height) * self.width + position.x % self.width
+
+    def position_at(self, index):
+        """
+        Inverse of GameMap.index.
+        :param index: A flat index in the map layers
+        :return: The position of that cell
+        """
+        return self._positions[index]
+
+    def directional_offset(self, position, direction):
+        """
+        Returns the normalized position next to a position in a direction.
+        :param position: The starting position
+        :param direction: A Direction cardinal tuple
+        :return: The canonical position of the neighbouring cell
+        """
+        if direction == Direction.Still:
+            return self.normalize(position)
+        return self._neighbours[self.index(position)][_CARDINAL_INDEX[direction]]
+
+    def get_surrounding_cardinals(self, position):
+        """
+        :param position: The position to look around
+        :return: The normalized positions around it, in Direction.get_all_cardinals() order
+        """
+        return list(self._neighbours[self.index(position)])
+
     def calculate_distance(self, source, target):
         """
         Compute the Manhattan distance between two locations.
@@ -94,11 +257,24 @@ class GameMap:
         :param target: The target to where calculate
         :return: The distance between these items
         """
-        source = self.normalize(source)
-        target = self.normalize(target)
-        resulting_position = abs(source - target)
-        return min(resulting_position.x, self.width - resulting_position.x) + \
-            min(resulting_position.y, self.height - resulting_position.y)
+        return self.dx_table[(source.x - target.x) % self.width] + \
+            self.dy_table[(source.y - target.y) % self.height]
+
+    def distance_field(self, target):
+        """
+        Compute the distance from every cell of the map to a location at once.
+        Accounts for wrap-around.
+        :param target: The position to measure the distance to
+        :return: A flat list of distances, indexed like the map layers (y * width + x)
+        """
+        shift_x = target.x % self.width
+        shift_y = target.y % self.height
+        # dx_table rotated so that row[x] is the distance from column x to the target column
+        row = self.dx_table[self.width - shift_x:] + self.dx_table[:self.width - shift_x]
+        field = []
+        for dy in self.dy_table[self.height - shift_y:] + self.dy_table[:self.height - shift_y]:
+            field.extend([dx + dy for dx in row])
+        return field
 
     def normalize(self, position):
         """
@@ -109,7 +285,215 @@ class GameMap:
         :param position: A position object.
         :return: A normalized position object fitting within the bounds of the map
         """
-        return Position(position.x % self.width, position.y % self.height)
+        return self._positions[self.index(position)]
+
+    def structure_field(self, player_id=None):
+        """
+        Compute the distance from every cell to its nearest structure (shipyard or dropoff)
+        with a multi-source breadth first search over the toroidal map.
+        :param player_id: Only consider structures of this player, None to consider every player
+        :return: A tuple (distances, nearest) of flat lists indexed like the map layers. nearest holds the
+            layer index of the closest structure. Both are -1 everywhere when there are no structures.
+        """
+        field = self._structure_fields.get(player_id)
+        if field is None:
+            sources = [index for index, owner in enumerate(self.structure_owner)
+                       if owner != -1 and (player_id is None or owner == player_id)]
+            field = self._structure_fields[player_id] = self._breadth_first_search(sources)
+        return field
+
+    def nearest_structure(self, position, player_id=None):
+        """
+        :param position: The position to search from
+        :param player_id: Only consider structures of this player, None to consider every player
+        :return: The closest shipyard or dropoff, None if there are no structures
+        """
+        nearest = self.structure_field(player_id)[1][self.index(position)]
+        if nearest == -1:
+            return None
+        return self._structure_refs[nearest]
+
+    def inspiration_field(self, player_id):
+        """
+        Count the opponent ships within constants.INSPIRATION_RADIUS of every cell.
+
+        Every opponent ship adds one to the diamond of cells around it, so the cost is the number of opponent
+        ships times the diamond area, whatever the map size. A ship of player_id on a cell is inspired when the
+        count there reaches constants.INSPIRATION_SHIP_COUNT (and constants.INSPIRATION_ENABLED is set).
+        :param player_id: The player whose ships would be inspired
+        :return: A flat list of counts, indexed like the map layers
+        """
+        field = self._inspiration_fields.get(player_id)
+        if field is None:
+            width, height = self.width, self.height
+            columns, rows = self._diamond(constants.INSPIRATION_RADIUS)
+            field = [0] * (width * height)
+            for index, owner in enumerate(self.ship_owner):
+                if owner == -1 or owner == player_id:
+                    continue
+                y, x = divmod(index, width)
+                for row, span in rows[y]:
+                    for column in columns[span][x]:
+                        field[row + column] += 1
+            self._inspiration_fields[player_id] = field
+        return field
+
+    def _diamond(self, radius):
+        """
+        The cells within a Manhattan radius, as windows to scan around any cell (x, y):
+        for row_start, span in rows[y]: for column in columns[span][x]: index = row_start + column.
+        Wrapped around, and without duplicates on maps smaller than the diamond.
+        :param radius: The radius of the diamond
+        :return: A tuple (columns, rows), computed once per radius
+        """
+        windows = self._diamonds.get(radius)
+        if windows is None:
+            width, height = self.width, self.height
+            # columns[span][x]: the columns within span of column x, rows[y]: (row start, span) pairs of the
+            # rows within the radius of row y
+            columns = [[tuple({(x + dx) % width for dx in range(-span, span + 1)}) for x in range(width)]
+                       for span in range(radius + 1)]
+            rows = [tuple({((y + dy) % height) * width: radius - self.dy_table[dy % height]
+                           for dy in range(-radius, radius + 1)}.items())
+                    for y in range(height)]
+            windows = self._diamonds[radius] = (columns, rows)
+        return windows
+
+    def halite_density(self, radius):
+        """
+        Sum the halite within a Manhattan radius of every cell.
+
+        The diamond is built from vertical windows: the window of half height s is the one of half height s - 1
+        plus a row above and a row below, then every cell adds the windows of half height radius - |dx| of the
+        columns dx away. Each step works on whole rows, so the board is done in about 2 * radius * area additions.
+        :param radius: The radius of the diamond, at most (min(width, height) - 1) // 2 (larger values are clamped
+            so that no cell is counted twice)
+        :return: A flat list of halite sums, indexed like the map layers
+        """
+        radius = max(0, min(radius, (min(self.width, self.height) - 1) // 2))
+        self._used_fields.add(('density', radius))
+        cached = self._densities.get(radius)
+        if cached is not None and cached[0] == self._halite_version:
+            return cached[1]
+
+        width, height = self.width, self.height
+        rows = [self.halite[y * width:(y + 1) * width].tolist() for y in range(height)]
+        # windows[s][y][x]: halite of column x from row y - s to row y + s
+        windows = [rows]
+        for span in range(1, radius + 1):
+            previous = windows[-1]
+            windows.append([[middle + above + below for middle, above, below
+                             in zip(previous[y], rows[(y - span) % height], rows[(y + span) % height])]
+                            for y in range(height)])
+
+        density = []
+        for y in range(height):
+            sums = windows[radius][y]
+            for dx in range(1, radius + 1):
+                window = windows[radius - dx][y]
+                # columns x + dx and x - dx, wrapped around
+                sums = [total + right + left for total, right, left
+                        in zip(sums, window[dx:] + window[:dx], window[-dx:] + window[:-dx])]
+            density.extend(sums)
+        self._densities[radius] = (self._halite_version, density)
+        return density
+
+    def return_field(self, player_id):
+        """
+        Compute the cheapest way back to a structure of a player from every cell, with Dijkstra's algorithm
+        from all the structures at once. Among the shortest ways home (in moves), it picks the one burning the
+        least halite, moving off a cell costing 1/MOVE_COST_RATIO of its halite. Trading moves for halite is
+        left out: a detour costs turns of mining, which are worth more than the few halite it saves.
+        :param player_id: The player whose shipyard and dropoffs to return to
+        :return: A tuple (burn, steps, directions) of flat lists indexed like the map layers: the halite burned
+            on the way home, the number of moves it takes and the Direction of the first move. burn and steps are
+            0 on the structures and -1 everywhere when the player has none, directions holds None there.
+        """
+        self._used_fields.add(('return', player_id))
+        cached = self._return_fields.get(player_id)
+        if cached is not None and cached[0] == self._halite_version:
+            return cached[1]
+
+        size = self.width * self.height
+        burn = [-1] * size
+        steps = [-1] * size
+        directions = [None] * size
+        move_cost = [halite // constants.MOVE_COST_RATIO for halite in self.halite]
+        # from a neighbour of a cell back to that cell, in _neighbour_indices order
+        inverted = [Direction.invert(direction) for direction in Direction.get_all_cardinals()]
+        neighbour_indices = self._neighbour_indices
+
+        frontier = []
+        for index, owner in enumerate(self.structure_owner):
+            if owner == player_id:
+                burn[index] = steps[index] = 0
+                frontier.append(index)
+        step = 0
+        while frontier:
+            # Moves come before halite, so Dijkstra's order is plain breadth first: a cell is settled once the
+            # whole previous layer offered it their burn
+            step += 1
+            next_frontier = []
+            for index in frontier:
+                cost = burn[index]
+                for direction, neighbour in zip(inverted, neighbour_indices[index]):
+                    known = steps[neighbour]
+                    if known == -1:
+                        steps[neighbour] = step
+                        burn[neighbour] = cost + move_cost[neighbour]
+                        directions[neighbour] = direction
+                        next_frontier.append(neighbour)
+                    elif known == step and cost + move_cost[neighbour] < burn[neighbour]:
+                        burn[neighbour] = cost + move_cost[neighbour]
+                        directions[neighbour] = direction
+            frontier = next_frontier
+
+        field = (burn, steps, directions)
+        self._return_fields[player_id] = (self._halite_version, field)
+        return field
+
+    def warm_up(self, player_id, density_radii=()):
+        """
+        Builds the caches the first turns rely on, meant to run before Game.ready while turns are not timed yet.
+        The structure fields and the diamond windows last until a structure shows up; the halite fields are
+        patched from frame to frame while they are used (see _patch_halite_caches).
+        :param player_id: Our player id
+        :param density_radii: The radii of the halite densities to compute
+        :return: nothing
+        """
+        self.structure_field()
+        self.structure_field(player_id)
+        self._diamond(constants.INSPIRATION_RADIUS)
+        self.return_field(player_id)
+        for radius in density_radii:
+            self.halite_density(radius)
+
+    def _breadth_first_search(self, sources):
+        """
+        Multi-source breadth first search over the map.
+        :param sources: Layer indices to start from
+        :return: A tuple (distances, nearest) of flat lists with the distance to and the index of the closest source
+        """
+        distances = [-1] * (self.width * self.height)
+        nearest = [-1] * (self.width * self.height)
+        for source in sources:
+            distances[source] = 0
+            nearest[source] = source
+        neighbour_indices = self._neighbour_indices
+        frontier = list(sources)
+        distance = 0
+        while frontier:
+            distance += 1
+            next_frontier = []
+            for index in frontier:
+                source = nearest[index]
+                for neighbour in neighbour_indices[index]:
+                    if distances[neighbour] == -1:
+                        distances[neighbour] = distance
+                        nearest[neighbour] = source
+                        next_frontier.append(neighbour)
+            frontier = next_frontier
+        return distances, nearest
 
     @staticmethod
     def _get_target_direction(source, target):
@@ -135,14 +519,15 @@ class GameMap:
         source = self.normalize(source)
         destination = self.normalize(destination)
         possible_moves = []
-        distance = abs(destination - source)
+        distance_x = abs(destination.x - source.x)
+        distance_y = abs(destination.y - source.y)
         y_cardinality, x_cardinality = self._get_target_direction(source, destination)
 
-        if distance.x != 0:
-            possible_moves.append(x_cardinality if distance.x < (self.width / 2)
+        if distance_x != 0:
+            possible_moves.append(x_cardinality if distance_x < (self.width / 2)
                                   else Direction.invert(x_cardinality))
-        if distance.y != 0:
-            possible_moves.append(y_cardinality if distance.y < (self.height / 2)
+        if distance_y != 0:
+            possible_moves.append(y_cardinality if distance_y < (self.height / 2)
                                   else Direction.invert(y_cardinality))
         return possible_moves
 
@@ -157,7 +542,7 @@ class GameMap:
         # No need to normalize destination, since get_unsafe_moves
         # does that
         for direction in self.get_unsafe_moves(ship.position, destination):
-            target_pos = ship.position.directional_offset(direction)
+            target_pos = self.directional_offset(ship.position, direction)
             if not self[target_pos].is_occupied:
                 self[target_pos].mark_unsafe(ship)
                 return direction
@@ -171,25 +556,147 @@ class GameMap:
         :return: The map object
         """
         map_width, map_height = map(int, read_input().split())
-        game_map = [[None for _ in range(map_width)] for _ in range(map_height)]
-        for y_position in range(map_height):
-            cells = read_input().split()
-            for x_position in range(map_width):
-                game_map[y_position][x_position] = MapCell(Position(x_position, y_position),
-                                                           int(cells[x_position]))
-        return GameMap(game_map, map_width, map_height)
+        return GameMap._from_halite([list(map(int, read_input().split())) for _ in range(map_height)])
 
-    def _update(self):
+    @staticmethod
+    def _from_halite(rows):
+        """
+        Creates a map object from known halite amounts
+        :param rows: The halite of every cell, as a list of rows (rows[y][x])
+        :return: The map object
+        """
+        return GameMap([halite for row in rows for halite in row], len(rows[0]), len(rows))
+
+    def _update(self, cells):
         """
         Updates this map object from the input given by the game engine
+        :param cells: Flat list of changed cells this turn: [x, y, halite, x, y, halite, ...]
         :return: nothing
         """
         # Mark cells as safe for navigation (will re-mark unsafe cells
         # later)
-        for y in range(self.height):
-            for x in range(self.width):
-                self[Position(x, y)].ship = None
+        for index in self._marked_refs:
+            self._ship_refs[index] = None
+        del self._marked_refs[:]
+        for index in self._marked_indices:
+            self.ship_owner[index] = -1
+        del self._marked_indices[:]
+        self._inspiration_fields.clear()
+
+        changes = []
+        for cell_x, cell_y, cell_energy in zip(cells[0::3], cells[1::3], cells[2::3]):
+            index = cell_y * self.width + cell_x
+            if self.halite[index] != cell_energy:
+                changes.append((index, cell_energy - self.halite[index]))
+            self.halite[index] = cell_energy
+        if changes:
+            self._patch_halite_caches(changes)
+
+    def _set_halite(self, index, halite):
+        """
+        Changes the halite of one cell outside of a frame, e.g. when a strategy simulates mining on a map.
+        The cached halite fields are computed again the next time they are asked for.
+        :param index: The flat index of the cell
+        :param halite: Its new halite amount
+        :return: nothing
+        """
+        if self.halite[index] != halite:
+            self.halite[index] = halite
+            self._halite_version += 1
+
+    def _patch_halite_caches(self, changes):
+        """
+        Brings the halite densities and the return fields of the previous halite layer up to date, which costs
+        much less than computing them again when few cells changed. Only the ones read since the last update are
+        patched, the others go stale and are computed again if they are ever asked for.
+        :param changes: A list of (index, halite difference) of the cells that changed
+        :return: nothing
+        """
+        version = self._halite_version
+        self._halite_version += 1
+        used = self._used_fields
+        self._used_fields = set()
+        if len(changes) * _PATCH_RATIO > self.width * self.height:
+            return
+
+        width = self.width
+        for radius, (density_version, density) in list(self._densities.items()):
+            if density_version != version or ('density', radius) not in used:
+                continue
+            columns, rows = self._diamond(radius)
+            for index, difference in changes:
+                y, x = divmod(index, width)
+                for row, span in rows[y]:
+                    for column in columns[span][x]:
+                        density[row + column] += difference
+            self._densities[radius] = (self._halite_version, density)
+
+        changed = [index for index, _ in changes]
+        for player_id, (field_version, field) in list(self._return_fields.items()):
+            if field_version == version and ('return', player_id) in used:
+                self._repair_return_field(field, changed)
+                self._return_fields[player_id] = (self._halite_version, field)
+
+    def _repair_return_field(self, field, changed):
+        """
+        Updates a return field after the halite of some cells changed. The moves home do not change, only the
+        burn of the changed cells and of the cells whose cheapest way goes through them, which are revisited
+        layer by layer, moving away from the structures.
+        :param field: A (burn, steps, directions) tuple made by return_field, updated in place
+        :param changed: Indices of the cells whose halite changed
+        :return: nothing
+        """
+        burn, steps, directions = field
+        halite = self.halite
+        move_cost_ratio = constants.MOVE_COST_RATIO
+        neighbour_indices = self._neighbour_indices
+        cardinals = Direction.get_all_cardinals()
+        layers = {}
+        for index in changed:
+            if steps[index] > 0:
+                layers.setdefault(steps[index], set()).add(index)
+        step = min(layers, default=0)
+        while step in layers:
+            next_layer = layers.setdefault(step + 1, set())
+            for index in layers.pop(step):
+                best_cost = best_direction = None
+                for direction, neighbour in zip(cardinals, neighbour_indices[index]):
+                    if steps[neighbour] == step - 1 and (best_cost is None or burn[neighbour] < best_cost):
+                        best_cost, best_direction = burn[neighbour], direction
+                best_cost += halite[index] // move_cost_ratio
+                if best_cost != burn[index] or best_direction != directions[index]:
+                    burn[index] = best_cost
+                    directions[index] = best_direction
+                    next_layer.update(neighbour for neighbour in neighbour_indices[index]
+                                      if steps[neighbour] == step + 1)
+            if not next_layer:
+                del layers[step + 1]
+                step = min(layers, default=0)
+            else:
+                step += 1
 
-        for _ in range(int(read_input())):
-            cell_x, cell_y, cell_energy = map(int, read_input().split())
-            self[Position(cell_x, cell_y)].halite_amount = cell_energy
+    def _mark_ship(self, ship):
+        """
+        Records a ship reported by the engine in the cell and in the ship_owner layer.
+        :param ship: The ship to record
+        :return: nothing
+        """
+        index = self.index(ship.position)
+        if self._ship_refs[index] is None:
+            self._marked_refs.append(index)
+        self._ship_refs[index] = ship
+        self.ship_owner[index] = ship.owner
+        self._marked_indices.append(index)
+
+    def _mark_structure(self, structure):
+        """
+        Records a shipyard or a dropoff in the cell and in the structure_owner layer.
+        :param structure: The structure to record
+        :return: nothing
+        """
+        index = self.index(structure.position)
+        self._structure_refs[index] = structure
+        if self.structure_owner[index] != structure.owner:
+            self.structure_owner[index] = structure.owner
+            self._structure_fields.clear()
+            self._return_fields.clear()
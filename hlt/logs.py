@@ -0,0 +1,125 @@
+"""
+Logging for bots that must not spend their turn time on it.
+
+Game sets it up with setup_logging: records go through a queue to a thread that writes bot-<id>.log, so a log call
+costs the bot no file I/O. Log with lazy arguments (logging.info("ship %s", ship), not "ship %s" % ship): records
+dropped by the level or by the per-turn sampling are then never formatted.
+
+The level is picked at launch, from Game(log_level=...) or else the HLT_LOG_LEVEL environment variable, e.g.
+HLT_LOG_LEVEL=WARNING python3 MyBot.py. OFF disables logging and no log file is created.
+"""
+import logging
+import logging.handlers
+import os
+import queue
+
+"""Environment variable holding the log level when Game is not given one."""
+LOG_LEVEL_VARIABLE = 'HLT_LOG_LEVEL'
+
+"""The level used when nothing else is asked for, as the starter kit did."""
+DEFAULT_LOG_LEVEL = 'DEBUG'
+
+"""How many records of one message (same format string) are kept per turn, warnings and errors are always kept."""
+DEFAULT_RECORDS_PER_TURN = 20
+
+
+class TurnSampler(logging.Filter):
+    """
+    Keeps at most records_per_turn records of every message per turn, so a log call in a loop over the ships or
+    the cells writes a sample instead of thousands of lines. Records at WARNING and above always pass.
+    """
+    def __init__(self, records_per_turn=DEFAULT_RECORDS_PER_TURN):
+        super().__init__()
+        self.records_per_turn = records_per_turn
+        self._counts = {}
+        self.dropped = 0
+
+    def next_turn(self):
+        """
+        Starts a new turn, logging how many records the previous one dropped.
+        :return: nothing.
+        """
+        if self.dropped:
+            logging.getLogger(__name__).info("%s log records sampled out last turn", self.dropped)
+        self._counts.clear()
+        self.dropped = 0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, record.msg)
+        count = self._counts.get(key, 0)
+        self._counts[key] = count + 1
+        if count < self.records_per_turn:
+            return True
+        self.dropped += 1
+        return False
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """A QueueHandler which drains its listener when closed, so logging.shutdown loses no record."""
+    def __init__(self, log_queue, listener):
+        super().__init__(log_queue)
+        self.listener = listener
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        super().close()
+
+
+# The sampler of the configured handler, see next_turn
+_sampler = None
+
+
+def setup_logging(player_id, level=None, records_per_turn=DEFAULT_RECORDS_PER_TURN):
+    """
+    Sends the logs of the bot to bot-<player_id>.log through a background writer thread.
+    Does nothing when the root logger already has handlers, like logging.basicConfig.
+    :param player_id: Our player id, used in the file name
+    :param level: A level name (e.g. 'INFO') or number, 'OFF' to disable logging. Defaults to $HLT_LOG_LEVEL,
+        then to DEBUG, which unknown names also fall back to
+    :param records_per_turn: How many records of one message are kept per turn, None to keep them all
+    :return: nothing.
+    """
+    global _sampler
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    unknown = None
+    if level is None:
+        level = os.environ.get(LOG_LEVEL_VARIABLE) or DEFAULT_LOG_LEVEL
+    if isinstance(level, str):
+        if level.upper() == 'OFF':
+            logging.disable(logging.CRITICAL)
+            return
+        resolved = logging.getLevelName(level.upper())
+        if not isinstance(resolved, int):
+            # getLevelName answers 'Level <name>' for names it does not know
+            unknown = level
+            resolved = logging.getLevelName(DEFAULT_LOG_LEVEL)
+        level = resolved
+    root.setLevel(level)
+
+    log_queue = queue.Queue()
+    file_handler = logging.FileHandler("bot-{}.log".format(player_id), mode="w")
+    file_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    listener = logging.handlers.QueueListener(log_queue, file_handler)
+    handler = _QueueHandler(log_queue, listener)
+    if records_per_turn is not None:
+        _sampler = TurnSampler(records_per_turn)
+        handler.addFilter(_sampler)
+    root.addHandler(handler)
+    listener.start()
+    if unknown is not None:
+        logging.warning("Unknown log level %r, logging at %s", unknown, DEFAULT_LOG_LEVEL)
+
+
+def next_turn():
+    """
+    Resets the per-turn sampling, called by Game at the start of every turn.
+    :return: nothing.
+    """
+    if _sampler is not None:
+        _sampler.next_turn()
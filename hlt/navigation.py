@@ -0,0 +1,362 @@
+import heapq
+import random
+from collections import deque
+
+from . import constants
+from .positionals import Direction
+
+"""How many turns ahead PathPlanner coordinates the paths of our ships by default."""
+DEFAULT_PLAN_WINDOW = 8
+
+"""Search nodes PathPlanner may expand for one ship by default, bounding the time of a plan."""
+DEFAULT_PLAN_EXPANSIONS = 2000
+
+
+def rank_mining_moves(game_map, player_id, origins, stay_bonus=2):
+    """
+    Scores the five moves of a whole fleet of miners at once. Moving is worth the halite the ship mines on its
+    destination next turn minus the halite it burns to leave its cell, staying is worth stay_bonus times the halite
+    mined in place; the inspiration bonus counts in both. Each step works on one list over all the ships (the
+    origins, then the neighbours in every direction), so the time per ship stays flat as the fleet grows.
+    :param game_map: The map the ships are on
+    :param player_id: The owner of the ships, whose opponents inspire them
+    :param origins: The layer indices of the ships, see GameMap.index
+    :param stay_bonus: How many times the halite mined in place is worth when staying
+    :return: For every ship, the five directions from the best to the worst move, ties in random order
+    """
+    halite = game_map.halite
+    ratio = constants.EXTRACT_RATIO
+    if constants.INSPIRATION_ENABLED:
+        inspiration = game_map.inspiration_field(player_id)
+        threshold = constants.INSPIRATION_SHIP_COUNT
+        inspired_ratio = constants.INSPIRED_EXTRACT_RATIO
+        bonus = constants.INSPIRED_BONUS_MULTIPLIER
+
+    def mined(cells):
+        # the engine rounds the extracted amount up
+        if not constants.INSPIRATION_ENABLED:
+            return [-(-halite[cell] // ratio) for cell in cells]
+        amounts = []
+        for cell in cells:
+            if inspiration[cell] >= threshold:
+                amount = -(-halite[cell] // inspired_ratio)
+                amounts.append(amount + int(amount * bonus))
+            else:
+                amounts.append(-(-halite[cell] // ratio))
+        return amounts
+
+    neighbours = game_map._neighbour_indices
+    move_costs = [halite[origin] // constants.MOVE_COST_RATIO for origin in origins]
+    scores = [[amount * stay_bonus for amount in mined(origins)]]
+    for side in range(4):
+        destinations = [neighbours[origin][side] for origin in origins]
+        scores.append([amount - cost for amount, cost in zip(mined(destinations), move_costs)])
+
+    directions = [Direction.Still] + Direction.get_all_cardinals()
+    rand = random.random
+    return [[direction for _, _, direction in
+             sorted(zip(ship_scores, [rand(), rand(), rand(), rand(), rand()], directions), reverse=True)]
+            for ship_scores in zip(*scores)]
+
+
+class Navigator:
+    """
+    Resolves the moves of a whole fleet at once.
+
+    Every ship submits a ranked list of directions with request(). resolve() then picks one move per ship so that
+    no two ships end on the same cell while keeping the ships as close as possible to their preferences: it solves
+    a min-cost bipartite matching between ships and destination cells, where a move costs its rank. Swapping two
+    neighbouring ships is allowed, the engine only collides ships which end the turn on the same cell.
+
+    Staying still is always a (last resort) option, so every ship gets a move. Cells with enemy ships are blocked
+    unless unblock() or allow_collisions() is called for them.
+    """
+    def __init__(self, game_map, player_id):
+        self.game_map = game_map
+        self.player_id = player_id
+        self._requests = []
+        self._blocked = {index for index, owner in enumerate(game_map.ship_owner) if owner not in (-1, player_id)}
+        self._shared = set()
+        self._reserved = set()
+
+    def block(self, position):
+        """
+        Forbid ships to end the turn on this position.
+        :param position: The position to block
+        """
+        self._blocked.add(self.game_map.index(position))
+
+    def unblock(self, position):
+        """
+        Let ships end the turn on this position even if an enemy ship is there (e.g. to ram it).
+        :param position: The position to unblock
+        """
+        self._blocked.discard(self.game_map.index(position))
+
+    def allow_collisions(self, position):
+        """
+        Let any number of our ships end the turn on this position (e.g. our dropoff on the last turns).
+        :param position: The position where collisions are fine
+        """
+        index = self.game_map.index(position)
+        self._blocked.discard(index)
+        self._shared.add(index)
+
+    def request(self, ship, directions):
+        """
+        Register the wishes of a ship for this turn.
+        :param ship: The ship to move
+        :param directions: Directions ordered from the most to the least wanted
+        """
+        self._requests.append((ship, directions))
+
+    def is_reserved(self, position):
+        """
+        :param position: A position on the map
+        :return: Whether one of the resolved moves ends on this position
+        """
+        return self.game_map.index(position) in self._reserved
+
+    def resolve(self):
+        """
+        Assign a move to every ship that made a request.
+
+        The matching starts from every ship taking its favourite free cell and then fixes the conflicts with
+        shortest augmenting paths, so the work grows with the number of contested cells rather than the fleet size.
+        The destination cells are marked unsafe on the map, so naive_navigate keeps working afterwards.
+        :return: A list of (ship, direction) pairs, in request order
+        """
+        edges = [self._candidates(ship, directions) for ship, directions in self._requests]
+        ship_cell = [None] * len(edges)
+        cell_ship = {}
+
+        # Greedy start: every ship takes its cheapest candidate if nobody holds it yet
+        for ship_number, candidates in enumerate(edges):
+            index = candidates[0][0]
+            if index in self._shared or index not in cell_ship:
+                self._assign(ship_number, index, ship_cell, cell_ship)
+
+        for ship_number in range(len(edges)):
+            if ship_cell[ship_number] is None:
+                self._augment(ship_number, edges, ship_cell, cell_ship)
+
+        moves = []
+        for (ship, _), candidates, index in zip(self._requests, edges, ship_cell):
+            direction = next(direction for cell, direction, _ in candidates if cell == index)
+            self.game_map[self.game_map.position_at(index)].mark_unsafe(ship)
+            self._reserved.add(index)
+            moves.append((ship, direction))
+        self._requests = []
+        return moves
+
+    def _candidates(self, ship, directions):
+        """
+        Turn a ranked list of directions into matching edges.
+        :return: A list of (cell index, direction, cost) with costs relative to the best available option
+        """
+        game_map = self.game_map
+        origin = game_map.index(ship.position)
+        if ship.halite_amount < game_map.halite[origin] // constants.MOVE_COST_RATIO:
+            # not enough cargo to pay for moving, the engine will keep this ship in place
+            return [(origin, Direction.Still, 0)]
+
+        candidates = []
+        seen = set()
+        for rank, direction in enumerate(list(directions) + [Direction.Still]):
+            index = game_map.index(game_map.directional_offset(ship.position, direction))
+            if index in seen or (index in self._blocked and index != origin):
+                continue
+            seen.add(index)
+            candidates.append((index, direction, rank))
+        # Costs relative to the best option keep the greedy start optimal for the ships it places
+        best = candidates[0][2]
+        return [(index, direction, rank - best) for index, direction, rank in candidates]
+
+    def _assign(self, ship_number, index, ship_cell, cell_ship):
+        ship_cell[ship_number] = index
+        if index not in self._shared:
+            cell_ship[index] = ship_number
+
+    def _augment(self, root, edges, ship_cell, cell_ship):
+        """
+        Place a ship by the cheapest chain of reassignments (shortest augmenting path, Bellman-Ford style
+        since reassigning a ship refunds the cost of its current edge).
+        """
+        distance = {root: 0}
+        parent = {}
+        queue = deque([root])
+        queued = {root}
+        while queue:
+            ship_number = queue.popleft()
+            queued.discard(ship_number)
+            for index, _, cost in edges[ship_number]:
+                holder = cell_ship.get(index)
+                if holder is None or holder == ship_number or index in self._shared:
+                    continue
+                holder_cost = next(edge_cost for cell, _, edge_cost in edges[holder] if cell == index)
+                new_distance = distance[ship_number] + cost - holder_cost
+                if new_distance < distance.get(holder, float('inf')):
+                    distance[holder] = new_distance
+                    parent[holder] = (ship_number, index)
+                    if holder not in queued:
+                        queued.add(holder)
+                        queue.append(holder)
+
+        best = None
+        for ship_number, ship_distance in distance.items():
+            for index, _, cost in edges[ship_number]:
+                if index in self._shared or index not in cell_ship:
+                    if best is None or ship_distance + cost < best[0]:
+                        best = (ship_distance + cost, ship_number, index)
+
+        if best is None:
+            # Only possible when our ships already share a cell: nothing better than staying
+            ship_cell[root] = next(index for index, direction, _ in edges[root] if direction == Direction.Still)
+            return
+
+        # Walk back to the root: every ship on the path moves on and its parent takes over the cell it left
+        _, ship_number, index = best
+        while True:
+            self._assign(ship_number, index, ship_cell, cell_ship)
+            if ship_number == root:
+                break
+            ship_number, index = parent[ship_number]
+
+
+class PathPlanner:
+    """
+    Plans the paths of our ships a few turns ahead so they route around each other (windowed cooperative A*).
+
+    Ships are planned one after the other. Each plan is an A* search over (cell, turn) for the next `window`
+    turns, that avoids the (cell, turn) slots reserved by the ships planned before, then reserves its own slots.
+    Waiting is a move like any other, so a ship queues behind another instead of walking into it, and ships
+    heading in opposite directions pass each other. Beyond the window the paths are not coordinated, plans are
+    redone every turn.
+
+    plan() returns ranked directions, the first step of the path first, meant for Navigator.request: the
+    navigator still settles the conflicts of the next turn with the ships that were not planned.
+    """
+    def __init__(self, game_map, player_id, window=DEFAULT_PLAN_WINDOW, max_expansions=DEFAULT_PLAN_EXPANSIONS):
+        """
+        :param game_map: The map of this turn
+        :param player_id: Our player id, cells with other ships are blocked on the next turn
+        :param window: How many turns ahead the paths are coordinated
+        :param max_expansions: Search nodes a single plan may expand before settling for the best one seen
+        """
+        self.game_map = game_map
+        self.window = window
+        self.max_expansions = max_expansions
+        # (turn, cell index) -> id of the ship that will be there
+        self._reserved = {}
+        self._blocked = {index for index, owner in enumerate(game_map.ship_owner) if owner not in (-1, player_id)}
+
+    def reserve(self, position, turn=1, ship_id=-1):
+        """
+        Keep a cell free of planned ships at a turn, e.g. for a ship that cannot move.
+        :param position: The cell to reserve
+        :param turn: How many turns from now, 1 is the end of this turn
+        :param ship_id: The ship holding the cell, if any
+        """
+        self._reserved[(turn, self.game_map.index(position))] = ship_id
+
+    def unblock(self, position):
+        """
+        Let planned ships end the next turn on this position even if an enemy ship is there.
+        :param position: The position to unblock
+        """
+        self._blocked.discard(self.game_map.index(position))
+
+    def plan(self, ship, target, burn=None):
+        """
+        Plan the path of a ship to a target and reserve it.
+        :param ship: The ship to move
+        :param target: The position to reach
+        :param burn: Optionally, a flat list of the halite still to burn from every cell to the target (e.g. the
+            burn of GameMap.return_field), which picks the cheapest among the shortest paths
+        :return: Directions ordered from the most to the least wanted, the first step of the path first
+        """
+        game_map = self.game_map
+        origin = game_map.index(ship.position)
+        goal = game_map.index(target)
+        path = self._search(ship, origin, goal, burn)
+        for turn, index in enumerate(path, 1):
+            self._reserved[(turn, index)] = ship.id
+
+        directions = []
+        if path:
+            first = path[0]
+            directions.append(Direction.Still if first == origin else
+                              Direction.get_all_cardinals()[game_map._neighbour_indices[origin].index(first)])
+        for direction in game_map.get_unsafe_moves(ship.position, target):
+            if direction not in directions:
+                directions.append(direction)
+        return directions
+
+    def _search(self, ship, origin, goal, burn=None):
+        """
+        Space-time A* from origin, ends on reaching goal or the end of the window. Among paths of the same length,
+        the one burning the least halite wins: the halite burned so far plus burn[cell] for the rest of the way.
+        :return: The cell indices of the path for turns 1, 2, ..., empty when there is nothing to plan
+        """
+        if origin == goal:
+            return []
+        game_map = self.game_map
+        width, height = game_map.width, game_map.height
+        dx_table, dy_table = game_map.dx_table, game_map.dy_table
+        goal_y, goal_x = divmod(goal, width)
+        neighbour_indices = game_map._neighbour_indices
+        halite = game_map.halite
+        reserved = self._reserved
+        stuck = ship.halite_amount < halite[origin] // constants.MOVE_COST_RATIO
+        remaining = burn if burn is not None else [0] * (width * height)
+
+        def heuristic(index):
+            y, x = divmod(index, width)
+            return dx_table[(x - goal_x) % width] + dy_table[(y - goal_y) % height]
+
+        # (cell, turn) -> the node it was reached from, set when the node is expanded so that the cheapest wins
+        parent = {}
+        best = None
+        # (estimated moves, -turn, estimated burn, burned, cell, parent node): ties on moves go to the nodes
+        # furthest in time, the ones closest to the goal, then to the cheapest
+        frontier = [(heuristic(origin), 0, remaining[origin], 0, origin, None)]
+        expansions = 0
+        while frontier:
+            estimate, turn, _, burned, index, previous = heapq.heappop(frontier)
+            turn = -turn
+            if (index, turn) in parent:
+                continue
+            parent[(index, turn)] = previous
+            if index == goal or turn == self.window:
+                best = (index, turn, 0)
+                break
+            expansions += 1
+            if expansions > self.max_expansions:
+                break
+            if best is None or estimate - turn < best[2]:
+                # the node closest to the goal so far, where to go if the search runs out of expansions
+                best = (index, turn, estimate - turn)
+            next_turn = turn + 1
+            move_cost = halite[index] // constants.MOVE_COST_RATIO
+            steps = (index,) if stuck and turn == 0 else (index,) + neighbour_indices[index]
+            for step in steps:
+                if (step, next_turn) in parent:
+                    continue
+                holder = reserved.get((next_turn, step))
+                if holder is not None and holder != ship.id:
+                    continue
+                if next_turn == 1 and step in self._blocked and step != origin:
+                    continue
+                cost = burned if step == index else burned + move_cost
+                heapq.heappush(frontier, (next_turn + heuristic(step), -next_turn, cost + remaining[step], cost,
+                                          step, (index, turn)))
+
+        if best is None:
+            return []
+        path = []
+        node = best[:2]
+        while node != (origin, 0):
+            path.append(node[0])
+            node = parent[node]
+        path.reverse()
+        return path
@@ -1,40 +1,91 @@
 import json
 import logging
 import sys
+import threading
+import time
 
-from .common import read_input
-from . import constants
+from .common import read_input, read_frame, get_connection
+from . import constants, logs
+from .frame_cache import FrameCache, frame_cached
 from .game_map import GameMap, Player
+from .profiling import TurnProfiler
+from .registry import ShipRegistry
+from .timing import Deadline, DEFAULT_TURN_BUDGET, INIT_TIME_LIMIT
 
 
 class Game:
     """
     The game object holds all metadata pertinent to the game and all its contents
     """
-    def __init__(self):
+    def __init__(self, turn_budget=DEFAULT_TURN_BUDGET, log_level=None, metrics=None, profile_turns=None):
         """
         Initiates a game object collecting all start-state instances for the contained items for pre-game.
-        Also sets up basic logging.
+        Also sets up logging to bot-<id>.log, see hlt.logs.
+        :param turn_budget: Seconds per turn the bot may spend after update_frame, see Game.deadline
+        :param log_level: A level name or number, 'OFF' for no logging. Defaults to $HLT_LOG_LEVEL, then DEBUG
+        :param metrics: File to write the per-turn phase timings to, {id} is replaced by our id. Defaults to
+            $HLT_METRICS, see hlt.profiling
+        :param profile_turns: Turns to run under cProfile, e.g. "100,200-205". Defaults to $HLT_PROFILE_TURNS
         """
-        self.turn_number = 0
-
         # Grab constants JSON
         raw_constants = read_input()
         constants.load_constants(json.loads(raw_constants))
 
-        num_players, self.my_id = map(int, read_input().split())
+        num_players, my_id = map(int, read_input().split())
 
-        logging.basicConfig(
-            filename="bot-{}.log".format(self.my_id),
-            filemode="w",
-            level=logging.DEBUG,
-        )
+        logs.setup_logging(my_id, log_level)
+        self._init_state(my_id, turn_budget, TurnProfiler.from_environment(my_id, metrics, profile_turns))
 
         self.players = {}
         for player in range(num_players):
             self.players[player] = Player._generate()
         self.me = self.players[self.my_id]
         self.game_map = GameMap._generate()
+        for player in self.players.values():
+            self.game_map._mark_structure(player.shipyard)
+
+    def _init_state(self, my_id, turn_budget, profiler=None):
+        """
+        Sets up the state that does not come from the engine, shared with the games that are not fed by it
+        (see replay.ReplayGame).
+        :param my_id: Our player id
+        :param turn_budget: Seconds per turn the bot may spend after update_frame, see Game.deadline
+        :param profiler: The TurnProfiler of the game, None for one that is off
+        :return: nothing.
+        """
+        self.my_id = my_id
+        # The start-up time limit runs from here until ready, see warm_up
+        self._created = time.perf_counter()
+        self.turn_number = 0
+        # Restarted at the end of every update_frame, strategies can poll it to stay within the turn time limit
+        self.deadline = Deadline(turn_budget)
+        # Records of every ship in the game that persist from turn to turn, see ShipRegistry
+        self.ships = ShipRegistry()
+        # Values derived from the current frame, emptied by update_frame, see hlt.frame_cache
+        self.cache = FrameCache()
+        # Phase timings of every turn, see TurnProfiler
+        self.profiler = profiler if profiler is not None else TurnProfiler()
+        # Work run in the background while waiting for the next frame, see speculate
+        self._speculations = []
+        self._worker = None
+
+    def warm_up(self, *functions):
+        """
+        Does the expensive start-up work while the turns are not timed yet, to call before ready: fills the map
+        caches (see GameMap.warm_up) and runs the given functions, then logs how much of INIT_TIME_LIMIT the
+        start-up took.
+        :param functions: Callables without arguments, e.g. ranking the places of a strategy
+        :return: The seconds spent since the game was created
+        """
+        self.game_map.warm_up(self.my_id)
+        for function in functions:
+            function()
+        elapsed = time.perf_counter() - self._created
+        logging.info("Start-up took %.3fs, %.1f%% of the %ss allowed", elapsed, 100 * elapsed / INIT_TIME_LIMIT,
+                     INIT_TIME_LIMIT)
+        if elapsed > INIT_TIME_LIMIT / 2:
+            logging.warning("Start-up used more than half of the %ss allowed", INIT_TIME_LIMIT)
+        return elapsed
 
     def ready(self, name):
         """
@@ -43,37 +94,113 @@ class Game:
         """
         send_commands([name])
 
-    def update_frame(self):
+    @frame_cached
+    def enemies(self):
         """
-        Updates the game object's state.
-        :returns: nothing.
+        :return: A tuple of the other players, cached until the next frame
         """
-        self.turn_number = int(read_input())
-        logging.info("=============== TURN {:03} ================".format(self.turn_number))
+        return tuple(player for player in self.players.values() if player.id != self.my_id)
 
-        for _ in range(len(self.players)):
-            player, num_ships, num_dropoffs, halite = map(int, read_input().split())
-            self.players[player]._update(num_ships, num_dropoffs, halite)
-
-        self.game_map._update()
+    @frame_cached
+    def enemy_ships(self):
+        """
+        :return: A tuple of the ships of the other players, cached until the next frame
+        """
+        return tuple(ship for player in self.enemies() for ship in player._ships.values())
 
-        # Mark cells with ships as unsafe for navigation
-        for player in self.players.values():
-            for ship in player.get_ships():
-                self.game_map[ship.position].mark_unsafe(ship)
+    @frame_cached
+    def structures(self, player_id=None):
+        """
+        :param player_id: Only return the structures of this player, None for every player
+        :return: A tuple of the shipyards and dropoffs, cached until the next frame
+        """
+        players = self.players.values() if player_id is None else (self.players[player_id],)
+        return tuple(structure for player in players
+                     for structure in (player.shipyard,) + tuple(player._dropoffs.values()))
 
-            self.game_map[player.shipyard.position].structure = player.shipyard
-            for dropoff in player.get_dropoffs():
-                self.game_map[dropoff.position].structure = dropoff
+    def update_frame(self):
+        """
+        Updates the game object's state.
+        :returns: nothing.
+        """
+        with self.profiler.phase('read'):
+            frame = read_frame(len(self.players))
+        self._apply_frame(*frame)
 
-    @staticmethod
-    def end_turn(commands):
+    def _apply_frame(self, turn_number, players, cells):
+        """
+        Updates the game object's state from a parsed frame.
+        :param turn_number: The turn that starts
+        :param players: A list of (player_id, halite, ships, dropoffs), see common.read_frame
+        :param cells: Flat list of changed cells: [x, y, halite, ...]
+        :return: nothing.
+        """
+        self.turn_number = turn_number
+        self.profiler.start_turn(turn_number)
+        with self.profiler.phase('join'):
+            # the background work reads the map, it must be done before the frame changes it
+            self._join_speculation()
+        self.cache.clear()
+        logs.next_turn()
+        logging.info("=============== TURN %03d ================", self.turn_number)
+
+        with self.profiler.phase('apply_frame'):
+            for player, halite, ships, dropoffs in players:
+                self.players[player]._update(halite, ships, dropoffs)
+            self.ships.update(turn_number, players)
+
+            self.game_map._update(cells)
+
+            # Mark cells with ships as unsafe for navigation
+            for player in self.players.values():
+                for ship in player.get_ships():
+                    self.game_map._mark_ship(ship)
+
+                self.game_map._mark_structure(player.shipyard)
+                for dropoff in player.get_dropoffs():
+                    self.game_map._mark_structure(dropoff)
+
+        self.deadline.start()
+
+    def end_turn(self, commands):
         """
         Method to send all commands to the game engine, effectively ending your turn.
         :param commands: Array of commands to send to engine
         :return: nothing.
         """
-        send_commands(commands)
+        with self.profiler.phase('send'):
+            send_commands(commands)
+        self.profiler.end_turn()
+        self._start_speculation()
+
+    def speculate(self, function):
+        """
+        Registers work to run in a background thread after every end_turn, while the bot waits for the next
+        frame, e.g. filling the caches of the map: game.speculate(lambda: game.game_map.return_field(game.my_id)).
+        The next frame is applied once the work is over, and the map patches the halite caches with the changes
+        of the frame (see GameMap._update) instead of starting them over inside the timed part of the turn.
+        The functions must only read the game state.
+        :param function: A callable without arguments, its result is ignored
+        :return: nothing.
+        """
+        self._speculations.append(function)
+
+    def _start_speculation(self):
+        if self._speculations:
+            self._worker = threading.Thread(target=self._speculate, daemon=True)
+            self._worker.start()
+
+    def _speculate(self):
+        for function in self._speculations:
+            try:
+                function()
+            except Exception:
+                logging.exception("Background precomputation failed")
+
+    def _join_speculation(self):
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
 
 
 def send_commands(commands):
@@ -82,5 +209,9 @@ def send_commands(commands):
     :param commands: The list of commands to send.
     :return: nothing.
     """
+    connection = get_connection()
+    if connection is not None:
+        connection.send_commands(commands)
+        return
     print(" ".join(commands))
     sys.stdout.flush()
@@ -63,14 +63,32 @@ class Player:
         player, shipyard_x, shipyard_y = map(int, read_input().split())
         return Player(player, Shipyard(player, -1, Position(shipyard_x, shipyard_y)))
 
-    def _update(self, num_ships, num_dropoffs, halite):
+    def _update(self, halite, ships, dropoffs):
         """
         Updates this player object considering the input from the game engine for the current specific turn.
-        :param num_ships: The number of ships this player has this turn
-        :param num_dropoffs: The number of dropoffs this player has this turn
+
+        Ships and dropoffs still alive keep their objects, which are updated in place; a ship only gets a new
+        Position when it moved. Only new ids allocate entities.
         :param halite: How much halite the player has in total
+        :param ships: Flat list of ship records this turn: [id, x, y, halite, id, x, y, halite, ...]
+        :param dropoffs: Flat list of dropoff records this turn: [id, x, y, id, x, y, ...]
         :return: nothing.
         """
         self.halite_amount = halite
-        self._ships = {id: ship for (id, ship) in [Ship._generate(self.id) for _ in range(num_ships)]}
-        self._dropoffs = {id: dropoff for (id, dropoff) in [Dropoff._generate(self.id) for _ in range(num_dropoffs)]}
+        previous = self._ships
+        self._ships = {}
+        for ship_id, x, y, cargo in zip(ships[0::4], ships[1::4], ships[2::4], ships[3::4]):
+            ship = previous.get(ship_id)
+            if ship is None:
+                ship = Ship(self.id, ship_id, Position(x, y), cargo)
+            else:
+                if ship.position.x != x or ship.position.y != y:
+                    ship.position = Position(x, y)
+                ship.halite_amount = cargo
+            self._ships[ship_id] = ship
+
+        if len(dropoffs) != 3 * len(self._dropoffs):
+            # dropoffs never move nor disappear, only new ones need objects
+            previous = self._dropoffs
+            self._dropoffs = {dropoff_id: previous.get(dropoff_id) or Dropoff(self.id, dropoff_id, Position(x, y))
+                              for dropoff_id, x, y in zip(dropoffs[0::3], dropoffs[1::3], dropoffs[2::3])}
@@ -1,3 +1,5 @@
+from operator import attrgetter
+
 from . import commands
 
 
@@ -62,9 +64,18 @@ class Direction:
 
 
 class Position:
+    """
+    An immutable point on the map. Positions are hashable, so they can be used as dict keys and set members.
+    """
+    __slots__ = ('_x', '_y')
+
     def __init__(self, x, y):
-        self.x = x
-        self.y = y
+        self._x = x
+        self._y = y
+
+    # Read-only views of the slots, so that building a position stays two plain slot stores
+    x = property(attrgetter('_x'), doc="The column of the position")
+    y = property(attrgetter('_y'), doc="The row of the position")
 
     def directional_offset(self, direction):
         """
@@ -72,7 +83,7 @@ class Position:
         :param direction: the direction cardinal tuple
         :return: a new position moved in that direction
         """
-        return self + Position(*direction)
+        return Position(self._x + direction[0], self._y + direction[1])
 
     def get_surrounding_cardinals(self):
         """
@@ -81,29 +92,24 @@ class Position:
         return [self.directional_offset(current_direction) for current_direction in Direction.get_all_cardinals()]
 
     def __add__(self, other):
-        return Position(self.x + other.x, self.y + other.y)
+        return Position(self._x + other._x, self._y + other._y)
 
     def __sub__(self, other):
-        return Position(self.x - other.x, self.y - other.y)
-
-    def __iadd__(self, other):
-        self.x += other.x
-        self.y += other.y
-        return self
-
-    def __isub__(self, other):
-        self.x -= other.x
-        self.y -= other.y
-        return self
+        return Position(self._x - other._x, self._y - other._y)
 
     def __abs__(self):
-        return Position(abs(self.x), abs(self.y))
+        return Position(abs(self._x), abs(self._y))
+
+    def __reduce__(self):
+        return self.__class__, (self._x, self._y)
 
     def __eq__(self, other):
-        return self.x == other.x and self.y == other.y
+        if not isinstance(other, Position):
+            return NotImplemented
+        return self._x == other._x and self._y == other._y
 
-    def __ne__(self, other):
-        return not self.__eq__(other)
+    def __hash__(self):
+        return hash((self._x, self._y))
 
     def __repr__(self):
         return "{}({}, {})".format(self.__class__.__name__,
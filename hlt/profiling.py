@@ -0,0 +1,176 @@
+"""
+Per-turn timing of the bot phases.
+
+Game owns a TurnProfiler (game.profiler). Code wraps the steps it wants to see in phases:
+
+    with game.profiler.phase('collect'):
+        ...
+
+and every turn becomes one JSON line of the metrics file, e.g.
+{"turn": 12, "total": 0.0123, "phases": {"read": [0.0004, 1], "apply_frame": [0.0011, 1], ...}}
+with [seconds, calls] for every phase. Nested phases are named after their parents ("play_turn/navigation").
+"total" runs from the end of the frame parsing to end_turn, the part of the turn the bot spends on its own;
+"read" includes the wait for the engine.
+
+Turning it on at launch: Game(metrics="metrics-{id}.jsonl", profile_turns="100,200-205") or the HLT_METRICS and
+HLT_PROFILE_TURNS environment variables. The selected turns are also run under cProfile, each dumped next to the
+metrics file as <metrics file>.turn-<turn>.prof (python3 -m pstats <file>). When off, phase() costs one call.
+"""
+import cProfile
+import json
+import os
+import time
+
+"""Environment variable holding the metrics file path when Game is not given one, {id} is the player id."""
+METRICS_VARIABLE = 'HLT_METRICS'
+
+"""Environment variable holding the turns to run under cProfile, e.g. 1,100-110."""
+PROFILE_TURNS_VARIABLE = 'HLT_PROFILE_TURNS'
+
+
+def parse_turns(turns):
+    """
+    :param turns: A string like "1,100-110", or an iterable of turn numbers
+    :return: The set of turn numbers
+    """
+    if not isinstance(turns, str):
+        return set(turns)
+    selected = set()
+    for part in turns.split(','):
+        part = part.strip()
+        if '-' in part:
+            first, last = part.split('-')
+            selected.update(range(int(first), int(last) + 1))
+        elif part:
+            selected.add(int(part))
+    return selected
+
+
+class _Phase:
+    """Context manager timing one phase of a TurnProfiler."""
+    __slots__ = ('profiler', 'name', 'started')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        stack = self.profiler._stack
+        if stack:
+            self.name = stack[-1] + '/' + self.name
+        stack.append(self.name)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        profiler = self.profiler
+        profiler._stack.pop()
+        totals = profiler._phases.get(self.name)
+        if totals is None:
+            profiler._phases[self.name] = [elapsed, 1]
+        else:
+            totals[0] += elapsed
+            totals[1] += 1
+        return False
+
+
+class _NoPhase:
+    """What phase() returns when the profiler is off."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_PHASE = _NoPhase()
+
+
+class TurnProfiler:
+    """
+    Collects the wall time of named phases for every turn and writes them as JSON lines.
+    """
+    def __init__(self, path=None, profile_turns=()):
+        """
+        :param path: The metrics file to write, None to only profile profile_turns (or nothing)
+        :param profile_turns: Turn numbers to run under cProfile, see parse_turns
+        """
+        self.path = path
+        self.profile_turns = parse_turns(profile_turns or ())
+        self.enabled = path is not None or bool(self.profile_turns)
+        self.turn_number = None
+        self._file = open(path, 'w') if path is not None else None
+        self._phases = {}
+        self._stack = []
+        self._started = None
+        self._profile = None
+
+    @staticmethod
+    def from_environment(player_id, path=None, profile_turns=None):
+        """
+        :param player_id: Our player id, replaces {id} in the path
+        :param path: The metrics file, defaults to $HLT_METRICS
+        :param profile_turns: The turns to run under cProfile, defaults to $HLT_PROFILE_TURNS
+        :return: A TurnProfiler, off when nothing was asked for
+        """
+        path = path or os.environ.get(METRICS_VARIABLE) or None
+        if path is not None:
+            path = path.replace('{id}', str(player_id))
+        if profile_turns is None:
+            profile_turns = os.environ.get(PROFILE_TURNS_VARIABLE) or ()
+        return TurnProfiler(path, profile_turns)
+
+    def phase(self, name):
+        """
+        :param name: The phase name
+        :return: A context manager adding the time spent in it to the phase of the current turn
+        """
+        if not self.enabled:
+            return _NO_PHASE
+        return _Phase(self, name)
+
+    def start_turn(self, turn_number):
+        """
+        Starts counting the bot time of a turn, once its frame was read.
+        :param turn_number: The turn that starts
+        :return: nothing.
+        """
+        if not self.enabled:
+            return
+        self.turn_number = turn_number
+        self._started = time.perf_counter()
+        if turn_number in self.profile_turns:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def end_turn(self):
+        """
+        Writes the metrics of the current turn, called when the commands are sent.
+        :return: nothing.
+        """
+        if not self.enabled or self._started is None:
+            return
+        total = time.perf_counter() - self._started
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats('{}.turn-{:03}.prof'.format(self.path or 'profile', self.turn_number))
+            self._profile = None
+        if self._file is not None:
+            phases = {name: [round(seconds, 6), calls] for name, (seconds, calls) in self._phases.items()}
+            self._file.write(json.dumps({'turn': self.turn_number, 'total': round(total, 6), 'phases': phases},
+                                        separators=(',', ':')) + '\n')
+            self._file.flush()
+        self._phases = {}
+        self._started = None
+
+    def close(self):
+        """
+        Closes the metrics file.
+        :return: nothing.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,144 @@
+import array
+
+
+class ShipRegistry:
+    """
+    Per-ship records that live as long as the ships do.
+
+    Anything a strategy wants to remember about a ship (a role, a target, how long it has been waiting) would
+    otherwise go to side dicts keyed by ship id, which are never cleaned up when ships die.
+    The registry keeps one row per ship id, updated in place from every frame, in typed arrays (one per column):
+
+        ships = game.ships
+        ships.add_column('target', 'i', default=-1)
+        for ship_id in ships.spawned:
+            ships.set('target', ship_id, pick_target(ship_id))
+        target = ships.get('target', ship.id)
+
+    Built-in columns: owner, x, y, halite, born (the turn the ship was first seen) and still (how many turns in a
+    row it did not move). Rows of destroyed ships are reused by new ships, with every column reset to its default.
+    """
+    def __init__(self):
+        self._rows = {}
+        self._free = []
+        self._size = 0
+        self._columns = {}
+        self._defaults = {}
+        # Ids of the ships that showed up in the last update
+        self.spawned = []
+        # Ids of the ships that disappeared in the last update (crashed or turned into a dropoff)
+        self.destroyed = []
+        for name, typecode, default in (('owner', 'b', -1), ('x', 'h', 0), ('y', 'h', 0), ('halite', 'h', 0),
+                                        ('born', 'h', 0), ('still', 'h', 0)):
+            self.add_column(name, typecode, default)
+
+    def add_column(self, name, typecode, default=0):
+        """
+        Attach a typed column to every ship.
+        :param name: The column name, used with get, set and column
+        :param typecode: An array module typecode, e.g. 'b', 'h', 'i' or 'd'
+        :param default: The value of the column for existing and new ships
+        :return: nothing.
+        """
+        if name in self._columns:
+            return
+        self._columns[name] = array.array(typecode, [default]) * self._size
+        self._defaults[name] = default
+
+    def column(self, name):
+        """
+        :param name: The column name
+        :return: The array backing a column, indexed by row (see ShipRegistry.row)
+        """
+        return self._columns[name]
+
+    def row(self, ship_id):
+        """
+        :param ship_id: The id of a live ship
+        :return: The index of the ship in the column arrays
+        """
+        return self._rows[ship_id]
+
+    def get(self, name, ship_id):
+        """
+        :param name: The column name
+        :param ship_id: The id of a live ship
+        :return: The value of the column for this ship
+        """
+        return self._columns[name][self._rows[ship_id]]
+
+    def set(self, name, ship_id, value):
+        """
+        :param name: The column name
+        :param ship_id: The id of a live ship
+        :param value: The new value of the column for this ship
+        :return: nothing.
+        """
+        self._columns[name][self._rows[ship_id]] = value
+
+    def ids(self, owner=None):
+        """
+        :param owner: Only return the ships of this player, None for every player
+        :return: The ids of the live ships
+        """
+        if owner is None:
+            return list(self._rows)
+        owners = self._columns['owner']
+        return [ship_id for ship_id, row in self._rows.items() if owners[row] == owner]
+
+    def __contains__(self, ship_id):
+        return ship_id in self._rows
+
+    def __len__(self):
+        return len(self._rows)
+
+    def update(self, turn_number, players):
+        """
+        Brings the records up to date with a frame.
+        :param turn_number: The turn of the frame
+        :param players: A list of (player_id, halite, ships, dropoffs), see common.read_frame
+        :return: nothing.
+        """
+        rows = self._rows
+        owners, xs, ys = self._columns['owner'], self._columns['x'], self._columns['y']
+        halites, still = self._columns['halite'], self._columns['still']
+        seen = set()
+        spawned = []
+        for player_id, _, ships, _ in players:
+            for ship_id, x, y, cargo in zip(ships[0::4], ships[1::4], ships[2::4], ships[3::4]):
+                seen.add(ship_id)
+                row = rows.get(ship_id)
+                if row is None:
+                    row = rows[ship_id] = self._allocate()
+                    owners[row] = player_id
+                    self._columns['born'][row] = turn_number
+                    spawned.append(ship_id)
+                elif xs[row] == x and ys[row] == y:
+                    still[row] += 1
+                else:
+                    still[row] = 0
+                xs[row] = x
+                ys[row] = y
+                halites[row] = cargo
+
+        destroyed = [ship_id for ship_id in rows if ship_id not in seen] if len(seen) != len(rows) else []
+        for ship_id in destroyed:
+            self._release(rows.pop(ship_id))
+        self.spawned = spawned
+        self.destroyed = destroyed
+
+    def _allocate(self):
+        """
+        :return: A row with every column at its default
+        """
+        if self._free:
+            return self._free.pop()
+        for name, column in self._columns.items():
+            column.append(self._defaults[name])
+        self._size += 1
+        return self._size - 1
+
+    def _release(self, row):
+        for name, column in self._columns.items():
+            column[row] = self._defaults[name]
+        self._free.append(row)
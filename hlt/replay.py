@@ -0,0 +1,171 @@
+"""
+Offline access to the replays written by the game engine (halite --replay-directory replays/).
+
+    replay = Replay.load("replays/replay-20181020-123456+0000-1540000000-32-32.hlt")
+    game = replay.game(player_id=0)
+    for turn_number in game.turns():
+        ...  # game.players, game.me and game.game_map hold the state the bot saw at this turn
+
+Replays are zstd compressed JSON, reading them needs the zstandard package
+(python3.6 -m pip install --system --target . zstandard). Uncompressed JSON replays are read without it.
+"""
+import io
+import json
+
+from . import constants
+from .entity import Shipyard
+from .game_map import GameMap
+from .networking import Game
+from .player import Player
+from .positionals import Position
+from .timing import DEFAULT_TURN_BUDGET
+
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+
+class Replay:
+    """
+    A parsed replay file.
+
+    The engine records, for every turn, the ships at the start of the turn followed by the moves, events and cell
+    changes of that turn. frames() turns this back into the frames the bots received.
+    """
+    def __init__(self, data):
+        """
+        :param data: The decoded replay JSON
+        """
+        self.data = data
+        self.constants = data['GAME_CONSTANTS']
+        self.width = data['production_map']['width']
+        self.height = data['production_map']['height']
+        self.names = {player['player_id']: player['name'] for player in data['players']}
+
+    @staticmethod
+    def load(path):
+        """
+        Reads a replay file, decompressing it on the fly.
+        :param path: Path to a .hlt replay (zstd compressed) or to a plain JSON replay
+        :return: The Replay object
+        """
+        with open(path, 'rb') as replay_file:
+            if replay_file.read(4) != ZSTD_MAGIC:
+                replay_file.seek(0)
+                return Replay(json.load(replay_file))
+            replay_file.seek(0)
+            try:
+                import zstandard
+            except ImportError:
+                raise ImportError("Reading compressed replays needs the zstandard package") from None
+            with zstandard.ZstdDecompressor().stream_reader(replay_file) as reader:
+                return Replay(json.load(io.TextIOWrapper(reader, encoding='utf-8')))
+
+    @property
+    def num_turns(self):
+        """
+        :return: How many turns were played
+        """
+        return len(self.data['full_frames']) - 1
+
+    def halite_rows(self):
+        """
+        :return: The halite of every cell at the start of the game, as rows[y][x]
+        """
+        return [[cell['energy'] for cell in row] for row in self.data['production_map']['grid']]
+
+    def frames(self):
+        """
+        Generates the frames sent to the bots, turn by turn, in the format of common.read_frame.
+        :return: A generator of (turn_number, players, cells)
+        """
+        full_frames = self.data['full_frames']
+        halite = {player_id: self.constants['INITIAL_ENERGY'] for player_id in self.names}
+        dropoffs = {player_id: [] for player_id in self.names}
+        for turn_number in range(1, len(full_frames)):
+            # cells, halite and new dropoffs come from what happened during the previous turn
+            previous = full_frames[turn_number - 1]
+            for player_id, energy in previous.get('energy', {}).items():
+                halite[int(player_id)] = energy
+            for event in previous.get('events', []):
+                if event['type'] == 'construct':
+                    dropoffs[event['owner_id']] += [event['id'], event['location']['x'], event['location']['y']]
+            cells = []
+            for cell in previous.get('cells', []):
+                cells += [cell['x'], cell['y'], cell['production']]
+
+            entities = full_frames[turn_number].get('entities', {})
+            players = []
+            for player_id in sorted(self.names):
+                ships = []
+                for ship_id, ship in sorted(entities.get(str(player_id), {}).items(), key=lambda x: int(x[0])):
+                    ships += [int(ship_id), ship['x'], ship['y'], ship['energy']]
+                players.append((player_id, halite[player_id], ships, list(dropoffs[player_id])))
+            yield turn_number, players, cells
+
+    def game(self, player_id, turn_budget=DEFAULT_TURN_BUDGET):
+        """
+        :param player_id: The player whose point of view to take
+        :param turn_budget: Seconds per turn, see Game.deadline
+        :return: A ReplayGame at the start of the game
+        """
+        return ReplayGame(self, player_id, turn_budget)
+
+
+class ReplayGame(Game):
+    """
+    A Game fed from a replay instead of the engine.
+
+    It can be handed to bot code in place of hlt.Game: update_frame steps to the next recorded turn and end_turn
+    keeps the commands in self.commands instead of sending them. Like with the engine, update_frame leaves the
+    game with SystemExit after the last turn.
+    """
+    def __init__(self, replay, player_id, turn_budget=DEFAULT_TURN_BUDGET):
+        # Skip Game.__init__: there is no engine to read from and no log file to set up
+        self._init_state(player_id, turn_budget)
+        self.replay = replay
+        self.commands = []
+
+        constants.load_constants(replay.constants)
+        self.players = {}
+        for player in replay.data['players']:
+            location = player['factory_location']
+            shipyard = Shipyard(player['player_id'], -1, Position(location['x'], location['y']))
+            self.players[player['player_id']] = Player(player['player_id'], shipyard)
+        self.me = self.players[self.my_id]
+        self.game_map = GameMap._from_halite(replay.halite_rows())
+        for player in self.players.values():
+            self.game_map._mark_structure(player.shipyard)
+        self._frames = replay.frames()
+
+    def ready(self, name):
+        """Nothing to tell the engine, the replay was already played."""
+        pass
+
+    def update_frame(self):
+        """
+        Steps to the next recorded turn.
+        :returns: nothing.
+        """
+        try:
+            frame = next(self._frames)
+        except StopIteration:
+            raise SystemExit("End of replay")
+        self._apply_frame(*frame)
+
+    def end_turn(self, commands):
+        """
+        Records the commands of the current turn.
+        :param commands: Array of commands
+        :return: nothing.
+        """
+        self.commands.append((self.turn_number, list(commands)))
+        self.profiler.end_turn()
+        self._start_speculation()
+
+    def turns(self):
+        """
+        Steps through all the turns of the replay.
+        :return: A generator of turn numbers, the game holds the state of each turn when it is yielded
+        """
+        for frame in self._frames:
+            self._apply_frame(*frame)
+            yield self.turn_number
@@ -0,0 +1,463 @@
+"""
+An in-process stand-in for the halite engine binary.
+
+    result = Simulator(["MyBot.py", "old_versions/v10.py"], size=32, seed=42).run()
+
+Each bot script runs in its own thread exactly as the engine would start it (as __main__), but hlt reads the frames
+from the simulator through common.set_connection instead of parsing stdin, so no text goes back and forth during the
+game. The rules follow docs/game-overview.md: move cost, extraction, inspiration, collisions, dropoff conversion and
+spawning. Only one game can run per process at a time, since hlt.constants is shared by every bot of the process.
+"""
+import json
+import logging
+import math
+import queue
+import random
+import threading
+import time
+from collections import deque
+
+from . import commands as engine_commands
+from .common import set_connection
+from .timing import INIT_TIME_LIMIT, TURN_TIME_LIMIT
+
+"""Game length by map size, as played by the engine."""
+MAX_TURNS = {32: 400, 40: 425, 48: 450, 56: 475, 64: 500}
+
+GAME_CONSTANTS = {
+    'NEW_ENTITY_ENERGY_COST': 1000,
+    'DROPOFF_COST': 4000,
+    'MAX_ENERGY': 1000,
+    'MAX_TURNS': 400,
+    'EXTRACT_RATIO': 4,
+    'MOVE_COST_RATIO': 10,
+    'INSPIRATION_ENABLED': True,
+    'INSPIRATION_RADIUS': 4,
+    'INSPIRATION_SHIP_COUNT': 2,
+    'INSPIRED_EXTRACT_RATIO': 4,
+    'INSPIRED_BONUS_MULTIPLIER': 2.0,
+    'INSPIRED_MOVE_COST_RATIO': 10,
+    'INITIAL_ENERGY': 5000,
+    'MAX_CELL_PRODUCTION': 1000,
+}
+
+_DIRECTIONS = {
+    engine_commands.NORTH: (0, -1),
+    engine_commands.SOUTH: (0, 1),
+    engine_commands.EAST: (1, 0),
+    engine_commands.WEST: (-1, 0),
+    engine_commands.STAY_STILL: (0, 0),
+}
+
+
+class _Connection:
+    """The pipe between the simulator and one bot thread, see common.set_connection."""
+    def __init__(self, lines):
+        self.lines = deque(lines)
+        self.frames = queue.Queue()
+        self.replies = queue.Queue()
+
+    def read_input(self):
+        if not self.lines:
+            raise SystemExit("The simulator only sends lines before the game starts")
+        return self.lines.popleft()
+
+    def read_ints(self, lines):
+        return [int(value) for _ in range(lines) for value in self.read_input().split()]
+
+    def read_frame(self, num_players):
+        frame = self.frames.get()
+        if frame is None:
+            raise SystemExit("Game over")
+        return frame
+
+    def send_commands(self, commands):
+        self.replies.put(list(commands))
+
+
+class _Player:
+    """Engine side state of a player."""
+    def __init__(self, player_id, bot, shipyard):
+        self.id = player_id
+        self.bot = bot
+        self.shipyard = shipyard
+        self.halite = 0
+        self.name = None
+        self.connection = None
+        self.thread = None
+        self.error = None
+        self.eliminated = None
+        self.latencies = []
+
+
+def generate_halite(size, num_players, rng, max_cell=GAME_CONSTANTS['MAX_CELL_PRODUCTION'], mean=150):
+    """
+    Generates a symmetric halite map from smoothed value noise.
+    :param size: Width and height of the map
+    :param num_players: 2 (mirrored left/right) or 4 (mirrored in both axes)
+    :param rng: A random.Random instance
+    :return: The halite of every cell, as rows[y][x]
+    """
+    tile_width = size // 2
+    tile_height = size // 2 if num_players == 4 else size
+    tile = [[0.0] * tile_width for _ in range(tile_height)]
+    for spacing, weight in ((8, 1.0), (4, 0.5), (2, 0.25)):
+        columns = tile_width // spacing + 2
+        rows = tile_height // spacing + 2
+        grid = [[rng.random() for _ in range(columns)] for _ in range(rows)]
+        for y in range(tile_height):
+            grid_y, fraction_y = divmod(y / spacing, 1)
+            grid_y = int(grid_y)
+            for x in range(tile_width):
+                grid_x, fraction_x = divmod(x / spacing, 1)
+                grid_x = int(grid_x)
+                top = grid[grid_y][grid_x] * (1 - fraction_x) + grid[grid_y][grid_x + 1] * fraction_x
+                bottom = grid[grid_y + 1][grid_x] * (1 - fraction_x) + grid[grid_y + 1][grid_x + 1] * fraction_x
+                tile[y][x] += weight * (top * (1 - fraction_y) + bottom * fraction_y)
+
+    # Sharpen the noise into rich patches and scale it to the wanted average
+    values = [[value ** 4 for value in row] for row in tile]
+    scale = mean / (sum(map(sum, values)) / (tile_width * tile_height))
+    tile = [[min(max_cell, int(value * scale)) for value in row] for row in values]
+
+    rows = [row + row[::-1] for row in tile]
+    if num_players == 4:
+        rows = rows + rows[::-1]
+    return rows
+
+
+def shipyard_positions(size, num_players):
+    """
+    :return: The (x, y) of every player's shipyard, matching the symmetry of generate_halite
+    """
+    quarter = size // 4
+    if num_players == 4:
+        return [(quarter, quarter), (size - 1 - quarter, quarter),
+                (quarter, size - 1 - quarter), (size - 1 - quarter, size - 1 - quarter)]
+    return [(quarter, size // 2), (size - 1 - quarter, size // 2)][:num_players]
+
+
+class Simulator:
+    """
+    Plays one game between bot scripts.
+    """
+    def __init__(self, bots, size=32, seed=None, time_limit=TURN_TIME_LIMIT, max_turns=None, quiet=True):
+        """
+        :param bots: Paths of the bot scripts, one per player (1, 2 or 4 players)
+        :param size: Width and height of the map
+        :param seed: Seed of the map generator, random if None
+        :param time_limit: Seconds a bot may take per turn before it is eliminated, None to wait forever
+        :param max_turns: Game length, by default the engine's length for this map size
+        :param quiet: Silence the logging of the bots, which otherwise all write to one file in this process, in
+            the working directory
+        """
+        self.size = size
+        self.seed = seed if seed is not None else random.randrange(2 ** 31)
+        self.time_limit = time_limit
+        self.quiet = quiet
+        self.constants = dict(GAME_CONSTANTS)
+        self.constants['MAX_TURNS'] = max_turns or MAX_TURNS.get(size, 400)
+
+        rng = random.Random(self.seed)
+        self.halite = [halite for row in generate_halite(size, len(bots), rng) for halite in row]
+        self.players = [_Player(player_id, bot, shipyard)
+                        for player_id, (bot, shipyard) in enumerate(zip(bots, shipyard_positions(size, len(bots))))]
+        for player in self.players:
+            player.halite = self.constants['INITIAL_ENERGY']
+
+        self.turn_number = 0
+        self._next_id = 0
+        # ship id -> [owner, x, y, cargo]
+        self.ships = {}
+        # dropoff id -> (owner, x, y)
+        self.dropoffs = {}
+        # cell index -> owner of the shipyard or dropoff on it
+        self.structures = {y * size + x: player.id for player in self.players for x, y in [player.shipyard]}
+        for index in self.structures:
+            # like the engine, no halite under the shipyards
+            self.halite[index] = 0
+        self._changed_cells = set()
+
+    def run(self):
+        """
+        Plays the game to the end.
+        :return: A dict with the number of turns played and, per player, the bot, its name, final halite,
+            rank, ship count, elimination reason (None if it survived) and the seconds taken by every turn
+        """
+        # The bots configure the root logger of this process (see logs.setup_logging), put it back afterwards
+        root = logging.getLogger()
+        previous_disable = logging.root.manager.disable
+        previous_handlers = list(root.handlers)
+        previous_level = root.level
+        if self.quiet:
+            logging.disable(logging.CRITICAL)
+            # setup_logging leaves a configured root logger alone, so the bots open no log file
+            root.addHandler(logging.NullHandler())
+        try:
+            self._start_bots()
+            for self.turn_number in range(1, self.constants['MAX_TURNS'] + 1):
+                commands = self._play_turn()
+                self._process_turn(commands)
+                if len(self.players) > 1 and sum(self._is_alive(player) for player in self.players) <= 1:
+                    break
+        finally:
+            for player in self.players:
+                if player.connection is not None:
+                    player.connection.frames.put(None)
+            for player in self.players:
+                if player.thread is not None:
+                    player.thread.join(self.time_limit or None)
+            for handler in list(root.handlers):
+                if handler not in previous_handlers:
+                    root.removeHandler(handler)
+                    handler.close()
+            root.setLevel(previous_level)
+            logging.disable(previous_disable)
+        return self._result()
+
+    def _start_bots(self):
+        halite_rows = [self.halite[y * self.size:(y + 1) * self.size] for y in range(self.size)]
+        for player in self.players:
+            lines = [json.dumps(self.constants), "{} {}".format(len(self.players), player.id)]
+            lines += ["{} {} {}".format(other.id, *other.shipyard) for other in self.players]
+            lines.append("{} {}".format(self.size, self.size))
+            lines += [" ".join(map(str, row)) for row in halite_rows]
+            player.connection = _Connection(lines)
+            player.thread = threading.Thread(target=self._run_bot, args=(player,), daemon=True)
+            player.thread.start()
+            try:
+                player.name = player.connection.replies.get(timeout=INIT_TIME_LIMIT)[0]
+            except queue.Empty:
+                self._eliminate(player, "timed out during initialization")
+            except IndexError:
+                self._eliminate(player, player.error or "sent no name")
+
+    @staticmethod
+    def _run_bot(player):
+        set_connection(player.connection)
+        try:
+            # Not runpy: it swaps sys.modules['__main__'] while the script runs, which breaks the host process and
+            # the other bots running at the same time
+            with open(player.bot, 'rb') as source:
+                code = compile(source.read(), player.bot, 'exec')
+            exec(code, {'__name__': '__main__', '__file__': player.bot})
+        except SystemExit:
+            pass
+        except BaseException as error:
+            player.error = "crashed: {!r}".format(error)
+        finally:
+            # unblock the simulator if the bot stops without answering
+            player.connection.replies.put([])
+
+    def _frame(self):
+        players = []
+        for player in self.players:
+            ships = []
+            for ship_id, (owner, x, y, cargo) in self.ships.items():
+                if owner == player.id:
+                    ships += [ship_id, x, y, cargo]
+            dropoffs = []
+            for dropoff_id, (owner, x, y) in self.dropoffs.items():
+                if owner == player.id:
+                    dropoffs += [dropoff_id, x, y]
+            players.append((player.id, player.halite, ships, dropoffs))
+        cells = []
+        for index in sorted(self._changed_cells):
+            cells += [index % self.size, index // self.size, self.halite[index]]
+        self._changed_cells.clear()
+        return self.turn_number, players, cells
+
+    def _play_turn(self):
+        """
+        Sends the frame to every bot in turn and collects their commands.
+        :return: player id -> list of commands
+        """
+        frame = self._frame()
+        commands = {}
+        for player in self.players:
+            if player.eliminated:
+                continue
+            started = time.perf_counter()
+            player.connection.frames.put(frame)
+            try:
+                reply = player.connection.replies.get(timeout=self.time_limit)
+            except queue.Empty:
+                self._eliminate(player, "timed out on turn {}".format(self.turn_number))
+                continue
+            player.latencies.append(time.perf_counter() - started)
+            if player.error:
+                self._eliminate(player, player.error)
+                continue
+            commands[player.id] = reply
+        return commands
+
+    def _eliminate(self, player, reason):
+        player.eliminated = reason
+        player.connection.frames.put(None)
+        for ship_id in [ship_id for ship_id, ship in self.ships.items() if ship[0] == player.id]:
+            del self.ships[ship_id]
+
+    def _is_alive(self, player):
+        if player.eliminated:
+            return False
+        return player.halite >= self.constants['NEW_ENTITY_ENERGY_COST'] or \
+            any(ship[0] == player.id for ship in self.ships.values())
+
+    def _index(self, x, y):
+        return (y % self.size) * self.size + x % self.size
+
+    def _inspired(self):
+        """
+        :return: The ids of the ships with enough enemy ships around them to be inspired
+        """
+        if not self.constants['INSPIRATION_ENABLED']:
+            return set()
+        radius = self.constants['INSPIRATION_RADIUS']
+        inspired = set()
+        for ship_id, (owner, x, y, _) in self.ships.items():
+            enemies = 0
+            for other_owner, other_x, other_y, _ in self.ships.values():
+                if other_owner == owner:
+                    continue
+                dx = abs(x - other_x)
+                dy = abs(y - other_y)
+                if min(dx, self.size - dx) + min(dy, self.size - dy) <= radius:
+                    enemies += 1
+            if enemies >= self.constants['INSPIRATION_SHIP_COUNT']:
+                inspired.add(ship_id)
+        return inspired
+
+    def _process_turn(self, commands):
+        constants = self.constants
+        inspired = self._inspired()
+        moves = {}
+        spawns = []
+        constructs = []
+        for player_id, player_commands in commands.items():
+            tokens = " ".join(player_commands).split()
+            commanded = set()
+            position = 0
+            while position < len(tokens):
+                command = tokens[position]
+                if command == engine_commands.GENERATE:
+                    if player_id not in spawns:
+                        spawns.append(player_id)
+                    position += 1
+                    continue
+                try:
+                    ship_id = int(tokens[position + 1])
+                except (IndexError, ValueError):
+                    break
+                ship = self.ships.get(ship_id)
+                if ship is None or ship[0] != player_id or ship_id in commanded:
+                    position += 3 if command == engine_commands.MOVE else 2
+                    continue
+                commanded.add(ship_id)
+                if command == engine_commands.CONSTRUCT:
+                    constructs.append(ship_id)
+                    position += 2
+                elif command == engine_commands.MOVE and position + 2 < len(tokens) \
+                        and tokens[position + 2] in _DIRECTIONS:
+                    moves[ship_id] = _DIRECTIONS[tokens[position + 2]]
+                    position += 3
+                else:
+                    break
+
+        # Dropoff conversions, the cargo and the halite under the ship lower the cost
+        for ship_id in constructs:
+            owner, x, y, cargo = self.ships[ship_id]
+            index = self._index(x, y)
+            player = self.players[owner]
+            cost = constants['DROPOFF_COST'] - cargo - self.halite[index]
+            if index in self.structures or player.halite < cost:
+                continue
+            player.halite -= cost
+            self.halite[index] = 0
+            self._changed_cells.add(index)
+            self.structures[index] = owner
+            self.dropoffs[ship_id] = (owner, x, y)
+            del self.ships[ship_id]
+            moves.pop(ship_id, None)
+
+        # Movement, paid from the cargo; ships that cannot pay stay in place
+        moved = set()
+        for ship_id, (dx, dy) in moves.items():
+            ship = self.ships[ship_id]
+            if dx == dy == 0:
+                continue
+            ratio = constants['INSPIRED_MOVE_COST_RATIO'] if ship_id in inspired else constants['MOVE_COST_RATIO']
+            cost = self.halite[self._index(ship[1], ship[2])] // ratio
+            if ship[3] < cost:
+                continue
+            ship[3] -= cost
+            ship[1] = (ship[1] + dx) % self.size
+            ship[2] = (ship[2] + dy) % self.size
+            moved.add(ship_id)
+
+        spawned = set()
+        for player_id in spawns:
+            player = self.players[player_id]
+            if player.halite < constants['NEW_ENTITY_ENERGY_COST']:
+                continue
+            player.halite -= constants['NEW_ENTITY_ENERGY_COST']
+            ship_id = self._new_id()
+            self.ships[ship_id] = [player_id, player.shipyard[0], player.shipyard[1], 0]
+            spawned.add(ship_id)
+
+        # Collisions sink every ship involved, the cargo goes to the sea or to the owner of the structure there
+        cells = {}
+        for ship_id, (_, x, y, _) in self.ships.items():
+            cells.setdefault(self._index(x, y), []).append(ship_id)
+        for index, ship_ids in cells.items():
+            if len(ship_ids) < 2:
+                continue
+            cargo = sum(self.ships[ship_id][3] for ship_id in ship_ids)
+            if index in self.structures:
+                self.players[self.structures[index]].halite += cargo
+            else:
+                self.halite[index] += cargo
+                self._changed_cells.add(index)
+            for ship_id in ship_ids:
+                del self.ships[ship_id]
+
+        for ship_id, ship in self.ships.items():
+            owner, x, y, cargo = ship
+            index = self._index(x, y)
+            if self.structures.get(index) == owner:
+                # Deposit on our own shipyard or dropoff
+                self.players[owner].halite += cargo
+                ship[3] = 0
+            elif ship_id not in moved and ship_id not in spawned and self.halite[index] > 0:
+                # Mining: 1/EXTRACT_RATIO of the cell, rounded up, plus the bonus when inspired
+                ratio = constants['INSPIRED_EXTRACT_RATIO'] if ship_id in inspired else constants['EXTRACT_RATIO']
+                extracted = min(int(math.ceil(self.halite[index] / ratio)), constants['MAX_ENERGY'] - cargo)
+                bonus = 0
+                if ship_id in inspired:
+                    bonus = int(extracted * constants['INSPIRED_BONUS_MULTIPLIER'])
+                self.halite[index] -= extracted
+                self._changed_cells.add(index)
+                ship[3] = min(constants['MAX_ENERGY'], cargo + extracted + bonus)
+
+    def _new_id(self):
+        ship_id = self._next_id
+        self._next_id += 1
+        return ship_id
+
+    def _result(self):
+        order = sorted(self.players, key=lambda player: (player.eliminated is None, player.halite), reverse=True)
+        ranks = {player.id: rank for rank, player in enumerate(order, 1)}
+        return {
+            'seed': self.seed,
+            'size': self.size,
+            'turns': self.turn_number,
+            'players': [{
+                'id': player.id,
+                'bot': player.bot,
+                'name': player.name,
+                'halite': player.halite,
+                'rank': ranks[player.id],
+                'ships': sum(ship[0] == player.id for ship in self.ships.values()),
+                'eliminated': player.eliminated,
+                'latencies': player.latencies,
+            } for player in self.players],
+        }
@@ -0,0 +1,50 @@
+import time
+
+"""The game engine kills a bot that takes longer than this many seconds to answer a turn."""
+TURN_TIME_LIMIT = 2.0
+
+"""Seconds a bot may take between receiving the initial state and calling Game.ready."""
+INIT_TIME_LIMIT = 30.0
+
+"""
+Seconds of a turn that strategies may use by default. The rest of TURN_TIME_LIMIT is left for
+reading the frame, sending the commands and the scheduling noise of the game servers.
+"""
+DEFAULT_TURN_BUDGET = 1.5
+
+
+class Deadline:
+    """
+    A time budget that starts counting when start() is called.
+
+    Expensive planners can poll expired() and return the best result found so far once the budget runs out.
+    """
+    def __init__(self, budget):
+        """
+        :param budget: How many seconds the budget lasts
+        """
+        self.budget = budget
+        self._started = time.perf_counter()
+
+    def start(self):
+        """Restart the budget from now."""
+        self._started = time.perf_counter()
+
+    def elapsed(self):
+        """
+        :return: Seconds spent since the budget was started
+        """
+        return time.perf_counter() - self._started
+
+    def remaining(self):
+        """
+        :return: Seconds left in the budget, negative once it is exceeded
+        """
+        return self.budget - self.elapsed()
+
+    def expired(self, margin=0.0):
+        """
+        :param margin: Seconds to keep in reserve, e.g. the expected cost of the next step
+        :return: Whether less than margin seconds are left
+        """
+        return self.remaining() <= margin
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# Python 3.6
+"""
+Plays MyBot against the old versions on every core, with the in-process simulator.
+
+    python3 tournament.py [--bot MyBot.py] [--opponents old_versions/*.py] [--players 2 4]
+                          [--sizes 32 40 48 56 64] [--seeds 0-9] [--processes 8] [--json results.json]
+
+Every (players, size, seed) combination is one match: the bot against every opponent in 2 player games, and
+against rotating groups of three opponents in 4 player games. Seats are rotated with the seed, so no bot keeps
+the same side of the map. A bot that takes longer than --time-limit on a turn is eliminated, like on the servers.
+"""
+import argparse
+import functools
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+from hlt.simulator import Simulator
+from hlt.timing import TURN_TIME_LIMIT
+
+
+def percentile(values, fraction):
+    """
+    :return: The nearest-rank percentile of values, 0 if there are none
+    """
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def schedule(bot, opponents, players, sizes, seeds):
+    """
+    :return: A list of (bots, size, seed) matches
+    """
+    matches = []
+    for num_players in players:
+        for size in sizes:
+            for seed in seeds:
+                if num_players == 2:
+                    groups = [[opponent] for opponent in opponents]
+                else:
+                    groups = [[opponents[(start + offset) % len(opponents)] for offset in range(3)]
+                              for start in range(len(opponents))]
+                for group in groups:
+                    seats = [bot] + group
+                    shift = seed % len(seats)
+                    matches.append((seats[shift:] + seats[:shift], size, seed))
+    return matches
+
+
+def _init_worker():
+    # The bots write their log files to the working directory, keep them out of the repository
+    os.chdir(tempfile.mkdtemp(prefix="tournament-"))
+
+
+def play(match, time_limit=TURN_TIME_LIMIT):
+    """
+    Plays one match, in a worker process.
+    :return: The result of Simulator.run
+    """
+    bots, size, seed = match
+    return Simulator(bots, size=size, seed=seed, time_limit=time_limit).run()
+
+
+def summarize(results):
+    """
+    Aggregates the game results per bot script.
+    :return: bot -> dict of games, wins, win_rate, mean_halite, eliminated and latency percentiles (seconds)
+    """
+    stats = {}
+    for result in results:
+        for player in result['players']:
+            bot = stats.setdefault(player['bot'], {'games': 0, 'wins': 0, 'halite': 0, 'eliminated': 0,
+                                                   'latencies': [], 'by_players': {}})
+            bot['games'] += 1
+            bot['wins'] += player['rank'] == 1
+            bot['halite'] += player['halite']
+            bot['eliminated'] += player['eliminated'] is not None
+            bot['latencies'] += player['latencies']
+            per_count = bot['by_players'].setdefault(len(result['players']), [0, 0])
+            per_count[0] += 1
+            per_count[1] += player['rank'] == 1
+
+    summary = {}
+    for name, bot in stats.items():
+        latencies = bot['latencies']
+        summary[name] = {
+            'games': bot['games'],
+            'wins': bot['wins'],
+            'win_rate': bot['wins'] / bot['games'],
+            'win_rate_by_players': {count: wins / games for count, (games, wins) in bot['by_players'].items()},
+            'mean_halite': bot['halite'] / bot['games'],
+            'eliminated': bot['eliminated'],
+            'latency_p50': percentile(latencies, 0.5),
+            'latency_p90': percentile(latencies, 0.9),
+            'latency_p99': percentile(latencies, 0.99),
+            'latency_max': max(latencies) if latencies else 0,
+        }
+    return summary
+
+
+def print_summary(summary):
+    print("{:<32} {:>6} {:>7} {:>7} {:>7} {:>10} {:>5} {:>8} {:>8} {:>8} {:>8}".format(
+        "bot", "games", "win%", "2p", "4p", "halite", "out", "p50 ms", "p90 ms", "p99 ms", "max ms"))
+    for name, bot in sorted(summary.items(), key=lambda item: -item[1]['win_rate']):
+        by_players = bot['win_rate_by_players']
+        print("{:<32} {:>6} {:>7.1%} {:>7} {:>7} {:>10.0f} {:>5} {:>8.2f} {:>8.2f} {:>8.2f} {:>8.2f}".format(
+            os.path.relpath(name, ROOT), bot['games'], bot['win_rate'],
+            "{:.1%}".format(by_players[2]) if 2 in by_players else "-",
+            "{:.1%}".format(by_players[4]) if 4 in by_players else "-",
+            bot['mean_halite'], bot['eliminated'],
+            bot['latency_p50'] * 1000, bot['latency_p90'] * 1000, bot['latency_p99'] * 1000,
+            bot['latency_max'] * 1000))
+
+
+def parse_seeds(text):
+    if '-' in text:
+        first, last = text.split('-')
+        return list(range(int(first), int(last) + 1))
+    return [int(seed) for seed in text.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play a bot against the old versions on every core")
+    parser.add_argument('--bot', default=os.path.join(ROOT, 'MyBot.py'))
+    parser.add_argument('--opponents', nargs='+',
+                        default=sorted(glob.glob(os.path.join(ROOT, 'old_versions', '*.py'))))
+    parser.add_argument('--players', type=int, nargs='+', default=[2, 4], choices=[2, 4])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[32, 40, 48, 56, 64])
+    parser.add_argument('--seeds', type=parse_seeds, default=list(range(10)), help="e.g. 0-9 or 1,5,7")
+    parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--time-limit', type=float, default=TURN_TIME_LIMIT, help="seconds per turn")
+    parser.add_argument('--json', help="also write the summary and every game result to this file")
+    args = parser.parse_args()
+
+    bot = os.path.abspath(args.bot)
+    opponents = [os.path.abspath(opponent) for opponent in args.opponents]
+    matches = schedule(bot, opponents, args.players, args.sizes, args.seeds)
+    print("Playing {} games on {} processes".format(len(matches), args.processes))
+
+    results = []
+    # One game per process at a time, so the bots of a game never compete for a core with another game
+    with multiprocessing.Pool(args.processes, initializer=_init_worker) as pool:
+        games = pool.imap_unordered(functools.partial(play, time_limit=args.time_limit), matches)
+        for done, result in enumerate(games, 1):
+            results.append(result)
+            if done % 10 == 0 or done == len(matches):
+                print("{}/{} games".format(done, len(matches)), file=sys.stderr)
+
+    summary = summarize(results)
+    print_summary(summary)
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump({'summary': summary, 'games': results}, output)
+
+
+if __name__ == "__main__":
+    main()